@@ -0,0 +1,252 @@
+"""
+Command-line batch scanner.
+
+Reads URLs (one per line, or NDJSON objects with a "url" field) from a file
+or stdin, scans them in parallel and appends one NDJSON result per URL to
+the output file. The output doubles as the checkpoint: re-running the same
+command after a crash skips every URL that already has a result.
+
+    python -m app.cli urls.txt -o results.ndjson --workers 16
+    cat urls.txt | python -m app.cli - --stages ssl,headers
+
+OWASP mapping and recommendations come from the rule table; --llm adds
+(batched) LLM enrichment and --no-llm turns off a BATCH_AI_ENRICHMENT default.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.config import BATCH_CONCURRENCY, BATCH_PER_HOST, BATCH_AI_ENRICHMENT
+from app.services.batch_service import scan_many, parse_url_line
+from app.services.scan_service import run_all_scans_async, SCAN_STAGES
+from app.utils.url_validator import validate_url
+
+logger = logging.getLogger(__name__)
+
+# fsync the output every N results (each line is flushed immediately)
+SYNC_EVERY = 100
+
+
+class CheckpointMismatch(Exception):
+    """
+    The output file holds results for a different input list
+    """
+
+
+class RunStats:
+    """
+    Counters and latencies for the summary line
+    """
+
+    def __init__(self, skipped: int = 0):
+        self.skipped = skipped
+        self.status: Dict[str, int] = {"ok": 0, "failed": 0, "invalid": 0}
+        self.latencies: List[float] = []
+        self.started = time.perf_counter()
+
+    def add(self, result: dict):
+        self.status[result["status"]] = self.status.get(result["status"], 0) + 1
+        if result.get("elapsed_ms") is not None:
+            self.latencies.append(result["elapsed_ms"])
+
+    @property
+    def scanned(self) -> int:
+        return sum(self.status.values())
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        latencies = sorted(self.latencies)
+        return {
+            "scanned": self.scanned,
+            **self.status,
+            "skipped": self.skipped,
+            "elapsed_s": round(elapsed, 1),
+            "urls_per_s": round(self.scanned / elapsed, 2) if elapsed else None,
+            "latency_ms": {
+                "p50": _percentile(latencies, 50),
+                "p90": _percentile(latencies, 90),
+                "p99": _percentile(latencies, 99),
+                "max": latencies[-1] if latencies else None,
+            },
+        }
+
+
+async def run_batch(
+    urls: Iterator[str],
+    output_path: str,
+    workers: int = BATCH_CONCURRENCY,
+    per_host: int = BATCH_PER_HOST,
+    stages: Optional[List[str]] = None,
+    progress_every: int = 0,
+    stats: Optional[RunStats] = None,
+    use_llm: bool = BATCH_AI_ENRICHMENT
+) -> RunStats:
+    """
+    Scan `urls` into `output_path`, resuming from the results already there
+    """
+    done = load_checkpoint(output_path)
+    stats = stats or RunStats()
+    stats.skipped = len(done)
+
+    if done:
+        logger.warning(f"Resuming: {len(done)} results already in {output_path}")
+
+    scan = functools.partial(run_all_scans_async, stages=stages, use_llm=use_llm)
+    todo = _remaining(urls, done)
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        try:
+            async for result in scan_many(todo, workers, per_host, scan=scan, indexed=True):
+                out.write(json.dumps(result, default=str) + "\n")
+                out.flush()
+                stats.add(result)
+
+                if stats.scanned % SYNC_EVERY == 0:
+                    os.fsync(out.fileno())
+                if progress_every and stats.scanned % progress_every == 0:
+                    _print_progress(stats)
+        finally:
+            out.flush()
+            os.fsync(out.fileno())
+
+    return stats
+
+
+def load_checkpoint(path: str) -> Dict[int, str]:
+    """
+    {index: url} of results already written to `path`.
+    A torn last line (crash mid-write) is cut off so it gets rescanned.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    done: Dict[int, str] = {}
+    with open(path, "r+b") as f:
+        offset = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                logger.warning(f"Dropping incomplete last line of {path}")
+                f.truncate(offset)
+                break
+
+            offset += len(line)
+            try:
+                record = json.loads(line)
+                done[record["index"]] = record["url"]
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Ignoring unreadable line at byte {offset - len(line)} of {path}")
+
+    return done
+
+
+# -------------------------
+# Helper functions
+# -------------------------
+
+def _remaining(urls: Iterator[str], done: Dict[int, str]) -> Iterator[Tuple[int, str]]:
+    # Indexes follow the input order, so they only line up with the checkpoint
+    # when the input is the same list
+    index = 0
+    for line in urls:
+        url = parse_url_line(line)
+        if url is None:
+            continue
+
+        if index in done:
+            if done[index] not in (url, validate_url(url)[2]):
+                raise CheckpointMismatch(
+                    f"Result #{index} is for {done[index]}, but input line #{index} is {url}"
+                )
+        else:
+            yield index, url
+        index += 1
+
+
+def _percentile(values: List[float], percent: float) -> Optional[float]:
+    if not values:
+        return None
+    position = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[position]
+
+
+def _print_progress(stats: RunStats):
+    summary = stats.summary()
+    print(
+        f"{summary['scanned']} scanned ({summary['ok']} ok, {summary['failed']} failed, "
+        f"{summary['invalid']} invalid), {summary['urls_per_s']} URLs/s, "
+        f"p50 {summary['latency_ms']['p50']} ms",
+        file=sys.stderr,
+    )
+
+
+def _parse_stages(value: str) -> List[str]:
+    stages = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in stages if name not in SCAN_STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown stage(s) {', '.join(unknown)}; choose from {', '.join(SCAN_STAGES)}"
+        )
+    return stages
+
+
+# -------------------------
+# CLI
+# -------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan many URLs into an NDJSON file (resumable)")
+    parser.add_argument("input", help="File with one URL per line, or - for stdin")
+    parser.add_argument("-o", "--output", default="scan_results.ndjson",
+                        help="NDJSON results file; also the resume checkpoint")
+    parser.add_argument("-w", "--workers", type=int, default=BATCH_CONCURRENCY,
+                        help="Scans running at once")
+    parser.add_argument("--per-host", type=int, default=BATCH_PER_HOST,
+                        help="Scans running at once against the same host")
+    parser.add_argument("--stages", type=_parse_stages, default=None,
+                        help=f"Comma-separated subset of: {', '.join(SCAN_STAGES)} "
+                             "(dependencies are added automatically)")
+    parser.add_argument("--llm", action=argparse.BooleanOptionalAction, default=BATCH_AI_ENRICHMENT,
+                        help="Enrich the rule-based analysis with the LLM (batched requests); "
+                             "default from BATCH_AI_ENRICHMENT")
+    parser.add_argument("--progress", type=int, default=100, metavar="N",
+                        help="Print progress every N results (0 = off)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    stats = RunStats()
+    exit_code = 0
+
+    try:
+        asyncio.run(run_batch(
+            source, args.output, args.workers, args.per_host,
+            args.stages, args.progress, stats, args.llm,
+        ))
+    except KeyboardInterrupt:
+        print("Interrupted; re-run the same command to resume", file=sys.stderr)
+        exit_code = 130
+    except CheckpointMismatch as e:
+        print(f"{e}. Use a different --output for a different URL list.", file=sys.stderr)
+        exit_code = 2
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    print(json.dumps(stats.summary(), indent=2), file=sys.stderr)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
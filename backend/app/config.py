@@ -9,6 +9,156 @@ load_dotenv()
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "15"))
 USER_AGENT = os.getenv("USER_AGENT", "SecurityScanner/1.0")
 
+# =========================
+# HTTP connection pools
+# =========================
+# Host pools kept alive per client, and max connections per host
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "32"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+# Block (instead of opening extra connections) when a host's pool is exhausted
+HTTP_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "True").lower() == "true"
+# Only used by the AI provider client (httpx); needs the optional `h2` package
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "True").lower() == "true"
+
+# =========================
+# Target page download
+# =========================
+# Bodies are streamed and cut at this many (decoded) bytes
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+# Wall-clock budget for reading the body, in seconds
+BODY_READ_DEADLINE = float(os.getenv("BODY_READ_DEADLINE", "20"))
+
+# =========================
+# Vulnerability lookup cache
+# =========================
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", ".cache/scanner_cache.sqlite3")
+# Seconds a CVE lookup is served as fresh
+VULN_CACHE_TTL = int(os.getenv("VULN_CACHE_TTL", str(24 * 3600)))
+# Extra seconds an expired entry is still served while it refreshes in the background
+VULN_CACHE_STALE_TTL = int(os.getenv("VULN_CACHE_STALE_TTL", str(7 * 24 * 3600)))
+# Failed lookups are not retried for this many seconds
+VULN_CACHE_NEGATIVE_TTL = int(os.getenv("VULN_CACHE_NEGATIVE_TTL", "300"))
+
+# =========================
+# Vulnerability sources
+# =========================
+# "api" queries services.nvd.nist.gov, "mirror" answers from the local feed import
+NVD_MODE = os.getenv("NVD_MODE", "api").lower()
+NVD_MIRROR_PATH = os.getenv("NVD_MIRROR_PATH", ".cache/nvd_mirror.sqlite3")
+# NVD API budget per rolling window; 0 = NVD's published limit (5 unkeyed, 50 with a key)
+NVD_REQUESTS_PER_WINDOW = int(os.getenv("NVD_REQUESTS_PER_WINDOW", "0"))
+NVD_RATE_WINDOW = float(os.getenv("NVD_RATE_WINDOW", "30"))
+# Re-queue a request this many times after a 403/429
+NVD_THROTTLE_RETRIES = int(os.getenv("NVD_THROTTLE_RETRIES", "2"))
+# Scans fail fast (and use cached data) instead of queueing longer than this
+NVD_MAX_QUEUE_WAIT = float(os.getenv("NVD_MAX_QUEUE_WAIT", "60"))
+# Keyword hits fetched when a version is known, before range filtering (NVD allows up to 2000)
+VERSION_FILTER_RESULTS = int(os.getenv("VERSION_FILTER_RESULTS", "100"))
+# Point at a local stand-in server for tests
+OSV_API_URL = os.getenv("OSV_API_URL", "https://api.osv.dev").rstrip("/")
+
+# =========================
+# Vulnerability stage
+# =========================
+# Technologies looked up at the same time within one scan
+VULN_LOOKUP_CONCURRENCY = int(os.getenv("VULN_LOOKUP_CONCURRENCY", "8"))
+# Seconds the whole lookup stage may take; unfinished lookups become error entries
+VULN_STAGE_DEADLINE = float(os.getenv("VULN_STAGE_DEADLINE", "45"))
+
+# =========================
+# Scan jobs
+# =========================
+# Scans executed at the same time in job mode
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "4"))
+# Jobs waiting for a worker before new submissions are refused
+SCAN_QUEUE_LIMIT = int(os.getenv("SCAN_QUEUE_LIMIT", "100"))
+# Seconds a finished job (and its report) stays retrievable
+SCAN_JOB_RETENTION = int(os.getenv("SCAN_JOB_RETENTION", "3600"))
+
+# =========================
+# Batch scans
+# =========================
+# Scans in flight across a whole batch, and per target host
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_PER_HOST = int(os.getenv("BATCH_PER_HOST", "2"))
+
+# =========================
+# Scan report cache
+# =========================
+REPORT_CACHE_ENABLED = os.getenv("REPORT_CACHE_ENABLED", "True").lower() == "true"
+# Seconds each part of a cached report stays valid. Page-derived parts
+# (fetch, headers, technology) are revalidated with ETag/Last-Modified after that.
+REPORT_TTL_PAGE = int(os.getenv("REPORT_TTL_PAGE", "600"))
+REPORT_TTL_VULNS = int(os.getenv("REPORT_TTL_VULNS", str(6 * 3600)))
+REPORT_TTL_NMAP = int(os.getenv("REPORT_TTL_NMAP", "3600"))
+# A valid certificate result is reused until this long before it expires, at most REPORT_TTL_SSL_MAX
+REPORT_TTL_SSL_MAX = int(os.getenv("REPORT_TTL_SSL_MAX", str(24 * 3600)))
+REPORT_SSL_EXPIRY_MARGIN = int(os.getenv("REPORT_SSL_EXPIRY_MARGIN", str(3 * 24 * 3600)))
+# Expired reports are kept this long so rescans can reuse their unchanged stages
+REPORT_CACHE_RETENTION = int(os.getenv("REPORT_CACHE_RETENTION", str(7 * 24 * 3600)))
+
+# =========================
+# Rule-based analysis / LLM enrichment
+# =========================
+# OWASP mapping, recommendations and explanation always come from the rule
+# table (app/data/owasp_rules.py); the LLM only enriches them.
+# False never calls the LLM (no-LLM fast path)
+AI_ENRICHMENT_ENABLED = os.getenv("AI_ENRICHMENT_ENABLED", "True").lower() == "true"
+# Bulk scans (/scan/batch, app.cli) enrich with the LLM only when enabled
+BATCH_AI_ENRICHMENT = os.getenv("BATCH_AI_ENRICHMENT", "False").lower() == "true"
+
+# =========================
+# AI analysis cache
+# =========================
+# Identical AI inputs reuse the stored analysis for this many seconds
+AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", str(24 * 3600)))
+# Least recently used analyses are dropped beyond this many
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000"))
+
+# =========================
+# Deferred AI analysis
+# =========================
+# "inline" waits for the AI call; "deferred" returns the rule-based report
+# first (ai_status "pending") and attaches the analysis in the background
+AI_MODE = os.getenv("AI_MODE", "inline").lower()
+# AI calls running at once for deferred scans
+AI_WORKERS = int(os.getenv("AI_WORKERS", "4"))
+
+# =========================
+# AI prompt size
+# =========================
+# Estimated input tokens per analysis prompt; lower-priority findings are trimmed to fit
+AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "1000"))
+AI_MAX_OUTPUT_TOKENS = int(os.getenv("AI_MAX_OUTPUT_TOKENS", "800"))
+
+# =========================
+# AI provider client
+# =========================
+# OpenAI-compatible endpoint to use instead of Groq's (e.g. a local stand-in
+# server for tests); requests go to {AI_BASE_URL}/openai/v1/chat/completions
+AI_BASE_URL = os.getenv("AI_BASE_URL") or None
+AI_MODEL = os.getenv("AI_MODEL", "llama-3.1-8b-instant")
+# Wall-clock budget for one generate() call, retries included, and for a single attempt
+AI_CALL_DEADLINE = float(os.getenv("AI_CALL_DEADLINE", "25"))
+AI_ATTEMPT_TIMEOUT = float(os.getenv("AI_ATTEMPT_TIMEOUT", "12"))
+# Retries after timeouts, connection errors, 429 and 5xx (full jitter backoff)
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "2"))
+AI_RETRY_BASE_DELAY = float(os.getenv("AI_RETRY_BASE_DELAY", "0.5"))
+# Consecutive failed calls that open the circuit, and seconds before a probe call
+AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", "3"))
+AI_BREAKER_COOLDOWN = float(os.getenv("AI_BREAKER_COOLDOWN", "30"))
+
+# =========================
+# Batched AI analysis (bulk scans)
+# =========================
+# Prompt plus expected answer of one multi-scan request, in (estimated) tokens
+AI_BATCH_TOKEN_BUDGET = int(os.getenv("AI_BATCH_TOKEN_BUDGET", "6000"))
+AI_BATCH_MAX_SCANS = int(os.getenv("AI_BATCH_MAX_SCANS", "8"))
+# Answer tokens reserved per scan in a batch
+AI_OUTPUT_TOKENS_PER_SCAN = int(os.getenv("AI_OUTPUT_TOKENS_PER_SCAN", "500"))
+# Seconds a bulk scan's AI request waits for others to share a batch with
+AI_BATCH_WINDOW = float(os.getenv("AI_BATCH_WINDOW", "2"))
+
 # =========================
 # Feature flags
 # =========================
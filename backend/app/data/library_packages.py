@@ -0,0 +1,44 @@
+# Detected technology name -> (OSV ecosystem, package name)
+# Names match the RegexDetector patterns and Wappalyzer fingerprints
+LIBRARY_PACKAGES = {
+    "jQuery": ("npm", "jquery"),
+    "jQuery UI": ("npm", "jquery-ui"),
+    "jQuery Migrate": ("npm", "jquery-migrate"),
+    "Lodash": ("npm", "lodash"),
+    "Underscore.js": ("npm", "underscore"),
+    "Moment.js": ("npm", "moment"),
+    "React": ("npm", "react"),
+    "Vue.js": ("npm", "vue"),
+    "Angular": ("npm", "@angular/core"),
+    "AngularJS": ("npm", "angular"),
+    "Next.js": ("npm", "next"),
+    "Nuxt.js": ("npm", "nuxt"),
+    "Svelte": ("npm", "svelte"),
+    "Ember.js": ("npm", "ember-source"),
+    "Backbone.js": ("npm", "backbone"),
+    "Handlebars": ("npm", "handlebars"),
+    "Mustache": ("npm", "mustache"),
+    "Bootstrap": ("npm", "bootstrap"),
+    "D3.js": ("npm", "d3"),
+    "D3": ("npm", "d3"),
+    "Chart.js": ("npm", "chart.js"),
+    "Three.js": ("npm", "three"),
+    "Axios": ("npm", "axios"),
+    "DOMPurify": ("npm", "dompurify"),
+    "Popper": ("npm", "@popperjs/core"),
+    "Select2": ("npm", "select2"),
+    "Socket.io": ("npm", "socket.io"),
+    "core-js": ("npm", "core-js"),
+    "Highcharts": ("npm", "highcharts"),
+    "Swiper": ("npm", "swiper"),
+    "Video.js": ("npm", "video.js"),
+    "TinyMCE": ("npm", "tinymce"),
+    "CKEditor": ("npm", "ckeditor4"),
+    "Express": ("npm", "express"),
+}
+
+# Libraries detected by release revision ("r125", "125") but published under
+# another version: template for the package version, filled with the revision
+PACKAGE_VERSION_FROM_REVISION = {
+    "Three.js": "0.{}.0",
+}
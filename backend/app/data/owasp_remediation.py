@@ -22,5 +22,13 @@ OWASP_REMEDIATION = {
             "Replace weak ciphers and certificates.",
             "Ensure certificates are valid and not expired."
         ]
+    },
+    "A03:2021": {
+        "name": "Injection",
+        "remediation": [
+            "Encode output and validate input on the server side.",
+            "Restrict script sources with a Content-Security-Policy.",
+            "Use parameterized queries for all database access."
+        ]
     }
 }
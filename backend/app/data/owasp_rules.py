@@ -0,0 +1,151 @@
+# Deterministic scan finding -> OWASP Top 10 (2021) rules, read by app.services.rule_engine
+#
+# "check" names a matcher in the engine, "value" is its argument. Every match
+# becomes one finding; "{...}" fields in "finding" and "recommendation" are
+# filled from the match. "severity": None takes the severity of the match.
+OWASP_RULES = [
+    # Transport security (A02)
+    {
+        "id": "https-disabled",
+        "check": "ssl_issue",
+        "value": "HTTPS not enabled",
+        "owasp": "A02:2021",
+        "confidence": "Confirmed",
+        "severity": "HIGH",
+        "finding": "Site is served without HTTPS",
+        "recommendation": "Serve the site over HTTPS only and redirect HTTP to HTTPS.",
+    },
+    {
+        "id": "certificate-expired",
+        "check": "ssl_issue",
+        "value": "SSL certificate expired",
+        "owasp": "A02:2021",
+        "confidence": "Confirmed",
+        "severity": "CRITICAL",
+        "finding": "TLS certificate expired on {expiry_date}",
+        "recommendation": "Renew the certificate and automate renewal (e.g. ACME).",
+    },
+    {
+        "id": "certificate-invalid",
+        "check": "ssl_issue",
+        "value": "Invalid or misconfigured SSL certificate",
+        "owasp": "A02:2021",
+        "confidence": "Confirmed",
+        "severity": "HIGH",
+        "finding": "TLS certificate is invalid or misconfigured",
+        "recommendation": "Install a certificate from a trusted CA that matches the hostname, with the full chain.",
+    },
+    {
+        "id": "legacy-tls",
+        "check": "tls_version",
+        "value": ["SSLv2", "SSLv3", "TLSv1", "TLSv1.1"],
+        "owasp": "A02:2021",
+        "confidence": "Confirmed",
+        "severity": "HIGH",
+        "finding": "Server negotiates outdated {tls_version}",
+        "recommendation": "Disable SSLv3, TLS 1.0 and TLS 1.1; allow TLS 1.2 and 1.3 only.",
+    },
+    {
+        "id": "missing-hsts",
+        "check": "missing_header",
+        "value": "Strict-Transport-Security",
+        "owasp": "A02:2021",
+        "confidence": "Confirmed",
+        "severity": "HIGH",
+        "finding": "Missing Strict-Transport-Security header",
+        "recommendation": "Send Strict-Transport-Security: max-age=31536000; includeSubDomains.",
+    },
+    {
+        "id": "cleartext-service",
+        "check": "open_port",
+        "value": [21, 23],
+        "owasp": "A02:2021",
+        "confidence": "Confirmed",
+        "severity": "HIGH",
+        "finding": "Cleartext service exposed: {port}/{service}",
+        "recommendation": "Replace {service} with an encrypted alternative (SFTP/SSH) or close port {port}.",
+    },
+
+    # Injection (A03)
+    {
+        "id": "missing-csp-xss",
+        "check": "missing_header",
+        "value": "Content-Security-Policy",
+        "owasp": "A03:2021",
+        "confidence": "Potential",
+        "severity": "MEDIUM",
+        "finding": "No Content-Security-Policy to limit the impact of XSS",
+        "recommendation": "Add a Content-Security-Policy that restricts script sources (avoid 'unsafe-inline').",
+    },
+
+    # Security misconfiguration (A05)
+    {
+        "id": "missing-security-header",
+        "check": "missing_header",
+        "value": [
+            "Content-Security-Policy",
+            "X-Frame-Options",
+            "X-Content-Type-Options",
+            "Permissions-Policy",
+            "Referrer-Policy",
+            "X-XSS-Protection",
+        ],
+        "owasp": "A05:2021",
+        "confidence": "Confirmed",
+        "severity": None,
+        "finding": "Missing {header} header",
+        "recommendation": "{header_recommendation}",
+    },
+    {
+        "id": "hsts-without-preload",
+        "check": "header_lacks",
+        "value": ["Strict-Transport-Security", "preload"],
+        "owasp": "A05:2021",
+        "confidence": "Informational",
+        "severity": "LOW",
+        "finding": "HSTS is set without the preload directive",
+        "recommendation": "Add 'preload' to Strict-Transport-Security and submit the domain to the HSTS preload list.",
+    },
+    {
+        "id": "exposed-sensitive-port",
+        "check": "port_risk",
+        "value": "HIGH",
+        "owasp": "A05:2021",
+        "confidence": "Confirmed",
+        "severity": "HIGH",
+        "finding": "Sensitive service reachable from the internet: {port}/{service}",
+        "recommendation": "Restrict port {port} ({service}) to trusted networks with a firewall or VPN.",
+    },
+    {
+        "id": "exposed-port",
+        "check": "port_risk",
+        "value": "MEDIUM",
+        "owasp": "A05:2021",
+        "confidence": "Potential",
+        "severity": "MEDIUM",
+        "finding": "Non-web port open: {port}/{service}",
+        "recommendation": "Close port {port} unless {service} must be public.",
+    },
+
+    # Vulnerable and outdated components (A06)
+    {
+        "id": "component-with-cves",
+        "check": "component_cves",
+        "value": None,
+        "owasp": "A06:2021",
+        "confidence": "Confirmed",
+        "severity": None,
+        "finding": "{component} has {count} known vulnerabilities (worst: {worst})",
+        "recommendation": "Upgrade {technology} to a release that fixes {cves}.",
+    },
+    {
+        "id": "component-lookup-failed",
+        "check": "component_lookup_error",
+        "value": None,
+        "owasp": "A06:2021",
+        "confidence": "Informational",
+        "severity": "INFO",
+        "finding": "Known vulnerabilities of {technology} could not be checked",
+        "recommendation": "Re-scan later or check {technology} advisories manually.",
+    },
+]
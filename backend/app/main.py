@@ -1,5 +1,7 @@
 import os
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
 from fastapi import FastAPI, HTTPException, Request
@@ -10,7 +12,7 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-from app.config import ALLOWED_ORIGINS, ENVIRONMENT
+from app.config import ALLOWED_ORIGINS, ENVIRONMENT, NVD_MODE
 from app.services.ssl_service import check_ssl
 from app.services.header_service import check_security_headers
 from app.services.tech_service import detect_technology
@@ -18,13 +20,40 @@ from app.services.severity_service import calculate_overall_severity
 from app.routes.scan import router as scan_router
 #from app.services.ai_recommendation_service import generate_ai_recommendations
 from app.config import AI_RECOMMENDATIONS_ENABLED
+from app.utils.http_client import close_http_clients, get_pool_stats
+from app.utils.sqlite_cache import get_cache_stats
+from app.vuln_sources.nvd_mirror import get_mirror
+from app.vuln_sources.nvd_scheduler import get_scheduler
+from app.services.job_service import get_job_manager
+from app.services.report_cache import get_report_cache
+from app.services.deferred_ai_service import get_deferred_ai
+from app.services.ai_analysis_service import get_ai_batcher, get_prompt_stats
+from app.services.ai_client import get_ai_client_stats
+from app.services.wappalyzer_detector import load_fingerprints, get_fingerprint_status
+
+
+# ---------------- Lifespan ----------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the Wappalyzer fingerprints once, shared by every scan
+    try:
+        await asyncio.to_thread(load_fingerprints)
+    except Exception as e:
+        logger.error(f"Failed to preload Wappalyzer fingerprints: {e}")
+
+    yield
+    get_job_manager().shutdown()
+    get_deferred_ai().shutdown()
+    # Shared keep-alive pools live as long as the app
+    close_http_clients()
 
 
 # ---------------- App Init ----------------
 app = FastAPI(
     title="Security Scanner API",
     description="Comprehensive website security scanning tool",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # ---------------- Logging ----------------
@@ -91,10 +120,29 @@ async def health():
             "header_check": True,
             "tech_detection": True,
             "wappalyzer": wappalyzer
-        }
+        },
+        "wappalyzer_fingerprints": get_fingerprint_status()
     }
 
 
+@app.get("/stats")
+async def stats():
+    """Runtime counters"""
+    return {
+        "http_pools": get_pool_stats(),
+        "scan_jobs": get_job_manager().stats(),
+        "caches": get_cache_stats(),
+        "report_cache": get_report_cache().stats(),
+        "deferred_ai": get_deferred_ai().stats(),
+        "ai_batches": get_ai_batcher().stats(),
+        "ai_prompts": get_prompt_stats(),
+        "ai_client": get_ai_client_stats(),
+        "nvd": {
+            "mode": NVD_MODE,
+            "mirror": get_mirror().stats() if NVD_MODE == "mirror" else None,
+            "scheduler": get_scheduler().stats()
+        }
+    }
 
 
 # ---------------- Local / Prod Run ----------------
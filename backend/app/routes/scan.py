@@ -1,8 +1,21 @@
 
-from fastapi import APIRouter
+import asyncio
+import json
+import tempfile
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-from app.services.scan_service import run_all_scans
+from app.config import AI_MODE
+from app.services.fetch_service import FetchContext
+from app.services.scan_service import run_all_scans_async
+from app.services.report_cache import run_cached_scan
+from app.services.job_service import get_job_manager, JobQueueFull
+from app.services.deferred_ai_service import get_deferred_ai, PENDING
+from app.services.batch_service import scan_many, to_ndjson, parse_url_line
+from app.utils.url_validator import validate_url
 
 router = APIRouter(
     prefix="/scan",
@@ -11,17 +24,183 @@ router = APIRouter(
 
 class ScanRequest(BaseModel):
     url: str
+    # "job" returns a job id immediately; poll GET /scan/{job_id}
+    mode: Literal["sync", "job"] = "sync"
+    # Ignore any cached report and scan again
+    force: bool = False
+    # "deferred" returns before the AI analysis (ai_status "pending");
+    # fetch it later from GET /scan/{scan_id}. "rules" never calls the LLM:
+    # OWASP mapping and recommendations come from the rule table only
+    ai_mode: Literal["inline", "deferred", "rules"] = "deferred" if AI_MODE == "deferred" else "inline"
 
 
 @router.post("/")
 def scan_url(payload: ScanRequest):
     print("🔥 SCAN ROUTE HIT")
 
-    scan_result = run_all_scans(payload.url)
+    is_valid, error, url = validate_url(payload.url)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error)
+
+    defer_ai = payload.ai_mode == "deferred"
+    use_llm = payload.ai_mode != "rules"
+
+    if payload.mode == "job":
+        try:
+            job = get_job_manager().submit(url, force=payload.force, defer_ai=defer_ai, use_llm=use_llm)
+        except JobQueueFull as e:
+            raise HTTPException(status_code=503, detail=f"Scan queue is full: {e}")
+
+        return JSONResponse(
+            status_code=202,
+            content={
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": f"/scan/{job.id}",
+            }
+        )
+
+    scan_result = run_cached_scan(url, force=payload.force, defer_ai=defer_ai, use_llm=use_llm)
 
     return scan_result
 
 
+# Uploaded URL lists larger than this are spooled to disk
+BATCH_SPOOL_BYTES = 1024 * 1024
+
+
+@router.post("/batch")
+async def scan_batch(request: Request):
+    """
+    Scan many URLs; results stream back as NDJSON in completion order.
+
+    Body: {"urls": [...]} as JSON, or a file sent as the raw body
+    (text/plain: one URL per line, application/x-ndjson: {"url": ...} per line).
+    Large lists should use the raw form, which is never held in memory.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type == "application/json":
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+        urls = body.get("urls") if isinstance(body, dict) else body
+        if not isinstance(urls, list):
+            raise HTTPException(status_code=400, detail='Expected {"urls": [...]}')
+
+    elif content_type.startswith("multipart/"):
+        raise HTTPException(
+            status_code=415,
+            detail="Send the URL file as the raw request body (text/plain or application/x-ndjson)"
+        )
+
+    else:
+        # Read the upload fully before streaming the response back
+        spool = tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_BYTES)
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        urls = _spooled_urls(spool)
+
+    return StreamingResponse(
+        to_ndjson(scan_many(urls)),
+        media_type="application/x-ndjson"
+    )
+
+
+# Seconds between keep-alive comments while no stage finishes
+SSE_HEARTBEAT_SECONDS = 15
+
+
+@router.get("/stream")
+async def scan_stream(url: str, ai_mode: Literal["inline", "deferred", "rules"] = "inline"):
+    """
+    Server-Sent Events: one event per finished stage (named after it),
+    then a `report` event with the merged report, or `error`.
+    With ai_mode=deferred the report comes before the AI analysis,
+    followed by an `ai` event with the completed report.
+    ai_mode=rules skips the LLM.
+    """
+    is_valid, error, url = validate_url(url)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error)
+
+    return StreamingResponse(
+        _stream_scan(url, ai_mode == "deferred", ai_mode != "rules"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/{job_id}")
+def scan_status(job_id: str):
+    """
+    Status, per-stage progress and (when finished) the report of a scan job,
+    or the report of a scan with deferred AI (by scan_id)
+    """
+    job = get_job_manager().get(job_id)
+    if job is not None:
+        return job.to_dict()
+
+    analysis = get_deferred_ai().get(job_id)
+    if analysis is not None:
+        return analysis.to_dict()
+
+    raise HTTPException(status_code=404, detail="Unknown or expired scan job")
+
+
+def _spooled_urls(spool):
+    with spool:
+        for raw in spool:
+            url = parse_url_line(raw.decode("utf-8", "replace"))
+            if url is not None:
+                yield url
+
+
+async def _stream_scan(url: str, defer_ai: bool = False, use_llm: bool = True):
+    events: asyncio.Queue = asyncio.Queue()
+
+    # Called on this event loop by the orchestrator
+    def on_stage(name, state, result):
+        if state == "done":
+            if isinstance(result, FetchContext):
+                result = result.summary()
+            events.put_nowait((name, result))
+
+    async def run():
+        try:
+            report = await run_all_scans_async(url, on_stage=on_stage, defer_ai=defer_ai, use_llm=use_llm)
+            events.put_nowait(("report", report))
+
+            if report.get("ai_status") == PENDING:
+                analysis = get_deferred_ai().get(report["scan_id"])
+                await get_deferred_ai().wait(analysis)
+                events.put_nowait(("ai", analysis.report))
+        except Exception as e:
+            events.put_nowait(("error", {"error": str(e)}))
+
+    task = asyncio.create_task(run())
+
+    try:
+        while True:
+            try:
+                name, data = await asyncio.wait_for(events.get(), SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            yield f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+            if name in ("ai", "error") or (name == "report" and data.get("ai_status") != PENDING):
+                break
+    finally:
+        # Client went away: stop the scan
+        if not task.done():
+            task.cancel()
+
+
 # from fastapi import APIRouter
 # from pydantic import BaseModel
 
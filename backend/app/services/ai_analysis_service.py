@@ -1,75 +1,197 @@
+import contextvars
+import hashlib
 import json
 import logging
-from app.services.ai_client import AIClient
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse, urlunparse
+
+from app.config import (
+    AI_CACHE_TTL,
+    AI_CACHE_MAX_ENTRIES,
+    AI_PROMPT_TOKEN_BUDGET,
+    AI_MAX_OUTPUT_TOKENS,
+    AI_BATCH_TOKEN_BUDGET,
+    AI_BATCH_MAX_SCANS,
+    AI_BATCH_WINDOW,
+    AI_OUTPUT_TOKENS_PER_SCAN,
+)
+from app.services.ai_client import AIClient, AIUnavailable
+from app.utils.ai_prompt import (
+    ANALYSIS_SYSTEM_PROMPT,
+    build_analysis_prompt,
+    build_batch_prompt,
+    compact_findings,
+    compact_json,
+    estimate_tokens,
+)
+from app.utils.sqlite_cache import get_cache
 
 logger = logging.getLogger(__name__)
 
+# Part of every cache key: bump when the prompt or model changes
+PROMPT_VERSION = "3"
+
+# Keys that differ between scans without changing what the AI is asked
+VOLATILE_INPUT_KEYS = {"timestamp", "scanned_at", "elapsed_ms", "stage_timings_ms", "fingerprints", "cache"}
+
+RESULT_KEYS = {"owasp", "risk", "recommendations", "explanation"}
+
+_prompt_stats = {"prompts": 0, "batched_prompts": 0, "tokens": 0, "max_tokens": 0, "trimmed_prompts": 0}
+_prompt_stats_lock = threading.Lock()
+
+_batched = contextvars.ContextVar("ai_batched", default=False)
+
+
+@contextmanager
+def batched_analysis():
+    """
+    AI analyses requested inside this block (same thread/task) are
+    collected with other scans' and sent as multi-scan requests
+    """
+    token = _batched.set(True)
+    try:
+        yield
+    finally:
+        _batched.reset(token)
+
+
+class AIAnalysisFailed(Exception):
+    """
+    The model gave no usable answer; never cached
+    """
+
 
 class AIAnalysisService:
     def __init__(self):
         self.client = AIClient()
+        self.cache = get_cache("ai_analysis", max_entries=AI_CACHE_MAX_ENTRIES)
 
     def analyze(self, scan_summary: dict) -> dict:
-        system_prompt = "You are a cybersecurity expert."
+        """
+        AI analysis of `scan_summary`; identical inputs are answered
+        from the cache for AI_CACHE_TTL seconds. Inside batched_analysis()
+        the call joins a shared multi-scan request.
+        """
+        if _batched.get():
+            return get_ai_batcher().analyze(scan_summary)
+        return self._analyze_one(scan_summary)
 
-        user_prompt = f"""
-Given the following website security findings, do ALL of the following:
+    @staticmethod
+    def is_fallback(result: dict) -> bool:
+        return result == AIAnalysisService._fallback()
 
-1. Map findings to OWASP Top 10 (2021)
-2. Assess overall risk level
-3. Open ports and exposed services increase attack surface
-4. SSH, databases, and admin services significantly increase risk
-5. Provide security recommendations
-6. Give a short human-readable explanation
+    def analyze_batch(self, scan_summaries: List[dict]) -> List[dict]:
+        """
+        Analyses for several scans, aligned with the input. Cache misses are
+        packed into as few requests as AI_BATCH_TOKEN_BUDGET allows, one
+        instruction block per request; scans missing from (or garbled in)
+        a batched answer fall back to a request of their own.
+        """
+        keys = [ai_cache_key(summary) for summary in scan_summaries]
+        by_key = dict(zip(keys, scan_summaries))
 
+        values, _ = self.cache.get_many_or_load(
+            keys,
+            lambda missing: self._generate_batches([(key, by_key[key]) for key in missing]),
+            ttl=AI_CACHE_TTL,
+            negative_ttl=0
+        )
 
-Rules:
-- Use ONLY provided data
-- Do NOT invent vulnerabilities
-- Return STRICT JSON only
-- No markdown, no explanations outside JSON
+        results = []
+        for key, summary in zip(keys, scan_summaries):
+            if key not in values:
+                values[key] = self._analyze_one(summary)
+            results.append(values[key])
+        return results
 
-Scan Data:
-{json.dumps(scan_summary, indent=2)}
+    # -------------------------
+    # Internals
+    # -------------------------
 
-Return JSON in this format:
-{{
-  "owasp": {{ }},
-  "risk": {{ }},
-  "recommendations": [],
-  "explanation": "string"
-}}
-"""
+    def _analyze_one(self, scan_summary: dict) -> dict:
+        try:
+            return self.cache.get_or_load(
+                ai_cache_key(scan_summary),
+                lambda: self._generate(scan_summary),
+                ttl=AI_CACHE_TTL,
+                negative_ttl=0,
+                transient=(AIAnalysisFailed,)
+            )
+        except AIAnalysisFailed:
+            return self._fallback()
 
-        raw = self.client.generate(system_prompt, user_prompt)
+    def _generate(self, scan_summary: dict) -> dict:
+        user_prompt, prompt_info = build_analysis_prompt(scan_summary)
+        _record_prompt(prompt_info["tokens"], prompt_info["trimmed"])
 
-        if not raw or not raw.strip():
-            logger.error("AI returned empty response")
-            return self._fallback()
+        try:
+            raw = self.client.generate(ANALYSIS_SYSTEM_PROMPT, user_prompt, max_tokens=AI_MAX_OUTPUT_TOKENS)
+        except AIUnavailable as e:
+            raise AIAnalysisFailed(str(e))
 
-        raw = raw.strip()
+        result = _parse_json(raw)
+        if not isinstance(result, dict):
+            raise AIAnalysisFailed("answer is not a JSON object")
 
-        # 1️⃣ Remove markdown if present
-        if raw.startswith("```"):
-            raw = raw.strip("`")
-            raw = raw.replace("json", "", 1).strip()
+        return {**result, "prompt": prompt_info}
 
-        # 2️⃣ Try direct JSON parse
-        try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            pass
+    def _generate_batches(self, items: List[Tuple[str, dict]]) -> Dict[str, dict]:
+        """
+        {cache key: analysis} for the scans the model answered properly
+        """
+        answered = {}
+        scan_budget = AI_PROMPT_TOKEN_BUDGET - estimate_tokens(ANALYSIS_SYSTEM_PROMPT + build_batch_prompt([]))
 
-        # 3️⃣ Try extracting JSON block
-        try:
-            start = raw.index("{")
-            end = raw.rindex("}") + 1
-            return json.loads(raw[start:end])
-        except Exception:
-            logger.error("AI returned invalid JSON")
-            return self._fallback()
+        # Each scan as it appears in the prompt: compact, trimmed to the single-scan budget
+        lines, trimmed = {}, {}
+        for key, summary in items:
+            findings, trimmed[key] = compact_findings(summary, scan_budget)
+            lines[key] = compact_json({"id": _batch_id(key), "scan": findings})
+
+        for batch in _pack([(key, lines[key]) for key, _ in items]):
+            if len(batch) == 1:
+                continue   # answered by its own request in analyze_batch
+
+            user_prompt = build_batch_prompt([line for _, line in batch])
+            tokens = estimate_tokens(ANALYSIS_SYSTEM_PROMPT + user_prompt)
+            _record_prompt(tokens, [name for key, _ in batch for name in trimmed[key]], batched=True)
+
+            try:
+                raw = self.client.generate(
+                    ANALYSIS_SYSTEM_PROMPT,
+                    user_prompt,
+                    max_tokens=AI_OUTPUT_TOKENS_PER_SCAN * len(batch)
+                )
+                parsed = _parse_json(raw)
+            except AIUnavailable as e:
+                # Scans fall back to single requests, which fail fast while the circuit is open
+                logger.warning(f"Batched AI request for {len(batch)} scans failed: {e}")
+                continue
+            except AIAnalysisFailed:
+                logger.warning(f"Batched AI answer for {len(batch)} scans unusable; analysing them one by one")
+                continue
+
+            for key, line in batch:
+                result = parsed.get(_batch_id(key)) if isinstance(parsed, dict) else None
+                if isinstance(result, dict) and RESULT_KEYS & result.keys():
+                    answered[key] = {
+                        **result,
+                        "prompt": {
+                            "tokens": estimate_tokens(line),
+                            "batch_tokens": tokens,
+                            "batch_size": len(batch),
+                            "trimmed": trimmed[key],
+                        },
+                    }
 
-    def _fallback(self) -> dict:
+        return answered
+
+    @staticmethod
+    def _fallback() -> dict:
         """
         Safe fallback if AI fails
         """
@@ -85,3 +207,189 @@ Return JSON in this format:
             "recommendations": [],
             "explanation": "AI analysis could not be generated for this scan."
         }
+
+
+class AIBatcher:
+    """
+    Collects analyses requested by concurrent scans for up to
+    AI_BATCH_WINDOW seconds and answers them with analyze_batch
+    """
+
+    def __init__(self, window: float = AI_BATCH_WINDOW, max_scans: int = AI_BATCH_MAX_SCANS, workers: int = 2):
+        self.window = window
+        self.max_scans = max_scans
+        self._queue: List[Tuple[dict, Future]] = []
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-batch")
+        self._dispatcher = None
+        self._counters = {"requested": 0, "batches": 0}
+
+    def analyze(self, scan_summary: dict) -> dict:
+        future = Future()
+        with self._cond:
+            self._counters["requested"] += 1
+            self._queue.append((scan_summary, future))
+            self._ensure_dispatcher()
+            self._cond.notify()
+        return future.result()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self._counters, "queued": len(self._queue)}
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch, name="ai-batcher", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+
+                # Wait for company, unless a full batch is already there
+                ends_at = time.monotonic() + self.window
+                while len(self._queue) < self.max_scans and time.monotonic() < ends_at:
+                    self._cond.wait(ends_at - time.monotonic())
+
+                batch, self._queue = self._queue, []
+                self._counters["batches"] += 1
+
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch: List[Tuple[dict, Future]]):
+        try:
+            results = AIAnalysisService().analyze_batch([summary for summary, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_ai_batcher() -> AIBatcher:
+    global _batcher
+
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = AIBatcher()
+    return _batcher
+
+
+def ai_cache_key(ai_input: dict) -> str:
+    """
+    Canonical hash of an AI input: sorted keys, no timestamps,
+    normalized URLs
+    """
+    canonical = json.dumps(
+        {"prompt_version": PROMPT_VERSION, "input": _canonical(ai_input)},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _canonical(value, key=None):
+    if isinstance(value, dict):
+        return {k: _canonical(v, k) for k, v in value.items() if k not in VOLATILE_INPUT_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if key == "url" and isinstance(value, str):
+        return _normalize_url(value)
+    return value
+
+
+def _normalize_url(url: str) -> str:
+    parsed = urlparse(url.strip())
+    return urlunparse((
+        parsed.scheme.lower(),
+        parsed.netloc.lower(),
+        parsed.path.rstrip("/"),
+        parsed.params,
+        parsed.query,
+        "",
+    ))
+
+
+def _parse_json(raw: str):
+    if not raw or not raw.strip():
+        logger.error("AI returned empty response")
+        raise AIAnalysisFailed("empty response")
+
+    raw = raw.strip()
+
+    # 1️⃣ Remove markdown if present
+    if raw.startswith("```"):
+        raw = raw.strip("`")
+        raw = raw.replace("json", "", 1).strip()
+
+    # 2️⃣ Try direct JSON parse
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        pass
+
+    # 3️⃣ Try extracting JSON block
+    try:
+        start = raw.index("{")
+        end = raw.rindex("}") + 1
+        return json.loads(raw[start:end])
+    except Exception:
+        logger.error("AI returned invalid JSON")
+        raise AIAnalysisFailed("invalid JSON")
+
+
+def _batch_id(key: str) -> str:
+    # Stable per scan input, short enough to cost little in the prompt
+    return "s" + key[:10]
+
+
+def _pack(items: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+    """
+    Split (key, prompt line) pairs into batches whose prompt plus expected
+    answer fit AI_BATCH_TOKEN_BUDGET (and at most AI_BATCH_MAX_SCANS scans)
+    """
+    overhead = estimate_tokens(ANALYSIS_SYSTEM_PROMPT + build_batch_prompt([]))
+    batches, current, used = [], [], overhead
+
+    for key, line in items:
+        cost = estimate_tokens(line) + AI_OUTPUT_TOKENS_PER_SCAN
+        if current and (used + cost > AI_BATCH_TOKEN_BUDGET or len(current) >= AI_BATCH_MAX_SCANS):
+            batches.append(current)
+            current, used = [], overhead
+        current.append((key, line))
+        used += cost
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _record_prompt(tokens: int, trimmed: List[str], batched: bool = False):
+    with _prompt_stats_lock:
+        _prompt_stats["batched_prompts" if batched else "prompts"] += 1
+        _prompt_stats["tokens"] += tokens
+        _prompt_stats["max_tokens"] = max(_prompt_stats["max_tokens"], tokens)
+        if trimmed:
+            _prompt_stats["trimmed_prompts"] += 1
+
+
+def get_prompt_stats() -> dict:
+    """
+    Estimated input tokens of the AI prompts sent so far
+    """
+    with _prompt_stats_lock:
+        stats = dict(_prompt_stats)
+
+    sent = stats["prompts"] + stats["batched_prompts"]
+    stats["avg_tokens"] = round(stats["tokens"] / sent) if sent else None
+    return stats
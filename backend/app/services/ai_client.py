@@ -1,30 +1,310 @@
-from groq import Groq
-from app.config import GROQ_API_KEY
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+from groq import Groq, APIConnectionError, APIStatusError
+from app.config import (
+    GROQ_API_KEY,
+    AI_BASE_URL,
+    AI_MODEL,
+    AI_CALL_DEADLINE,
+    AI_ATTEMPT_TIMEOUT,
+    AI_MAX_RETRIES,
+    AI_RETRY_BASE_DELAY,
+    AI_BREAKER_FAILURES,
+    AI_BREAKER_COOLDOWN,
+)
+from app.utils.http_client import get_ai_http_client
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Worth another attempt; other 4xx answers would fail the same way again
+RETRYABLE_STATUS = {408, 409, 429}
+
+# Latencies kept for the percentiles
+LATENCY_SAMPLES = 500
+
+
+class AIUnavailable(Exception):
+    """
+    The provider gave no answer (circuit open, deadline spent, or errors)
+    """
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failed calls and rejects calls
+    instantly for `cooldown` seconds. Then a single probe call is let
+    through (half-open): success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, failures: int = AI_BREAKER_FAILURES, cooldown: float = AI_BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._counters = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> Optional[bool]:
+        """
+        None when the call is rejected, True when it is the half-open probe,
+        False for a normal call
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+
+            if self.state == CLOSED:
+                return False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+
+            self._counters["rejected"] += 1
+            return None
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("AI provider recovered; circuit closed")
+            self.state = CLOSED
+            self._consecutive = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self.state == HALF_OPEN or self._consecutive >= self.failures:
+                if self.state != OPEN:
+                    logger.warning(
+                        f"AI provider failing ({self._consecutive} calls in a row); "
+                        f"circuit open for {self.cooldown}s"
+                    )
+                    self._counters["opened"] += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self):
+        """
+        Let the next call probe again if this one ended without a verdict
+        """
+        with self._lock:
+            self._probing = False
+
+    def retry_in(self) -> float:
+        """
+        Seconds until the next probe is allowed (0 unless open)
+        """
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+
+    def stats(self) -> dict:
+        retry_in = self.retry_in()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._consecutive,
+                "retry_in_s": round(retry_in, 1) if self.state == OPEN else None,
+                **self._counters,
+            }
+
 
 class AIClient:
+    """
+    Groq (or AI_BASE_URL) chat completions with a deadline per call,
+    bounded retries with jitter, and a circuit breaker shared by all
+    clients. generate() raises AIUnavailable instead of waiting on a
+    provider that is known to be down.
+    """
+
     def __init__(self):
-        if not GROQ_API_KEY:
+        if not GROQ_API_KEY and not AI_BASE_URL:
             raise RuntimeError("GROQ_API_KEY is not set")
 
-        self.client = Groq(api_key=GROQ_API_KEY)
+        self.client = Groq(
+            # Local stand-in servers ignore the key
+            api_key=GROQ_API_KEY or "local",
+            base_url=AI_BASE_URL,
+            http_client=get_ai_http_client(),
+            # Retries are ours, within the call deadline
+            max_retries=0,
+        )
+
+    def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 800,
+        deadline: float = AI_CALL_DEADLINE
+    ) -> str:
+        breaker = get_ai_breaker()
+        probe = breaker.allow()
+        if probe is None:
+            raise AIUnavailable(f"circuit open, retry in {breaker.retry_in():.0f}s")
+
+        try:
+            return self._attempt_all(breaker, probe, system_prompt, user_prompt, max_tokens, deadline)
+        finally:
+            # Whatever happened, never leave the circuit waiting on this probe
+            if probe:
+                breaker.release_probe()
+
+    def _attempt_all(self, breaker, probe, system_prompt, user_prompt, max_tokens, deadline) -> str:
+        give_up_at = time.monotonic() + deadline
+        # The half-open probe gets one attempt
+        attempts = 1 if probe else AI_MAX_RETRIES + 1
+        error = None
+
+        for attempt in range(attempts):
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                break
+
+            started = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(
+                    model=AI_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=max_tokens,
+                    timeout=min(AI_ATTEMPT_TIMEOUT, remaining)
+                )
+                content = response.choices[0].message.content
+            except (APIConnectionError, APIStatusError) as e:
+                _record_attempt(time.perf_counter() - started, ok=False)
+                error = e
+                if not _retryable(e):
+                    break
 
-    def generate(self, system_prompt: str, user_prompt: str) -> str:
+                delay = _backoff(attempt, e)
+                if attempt + 1 >= attempts or time.monotonic() + delay >= give_up_at:
+                    break
+
+                logger.info(f"AI call failed ({_describe(e)}); retrying in {delay:.2f}s")
+                _count("retries")
+                time.sleep(delay)
+                continue
+            except Exception as e:
+                # Malformed answers (no choices, validation errors): a provider failure, not retried
+                logger.warning(f"AI call failed unexpectedly: {e!r}")
+                _record_attempt(time.perf_counter() - started, ok=False)
+                error = e
+                break
+
+            _record_attempt(time.perf_counter() - started, ok=True)
+            breaker.record_success()
+            return content
+
+        # Rejected requests (4xx) are our fault, not the provider's
+        if error is None or _retryable(error):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+        reason = _describe(error) if error is not None else "deadline spent"
+        _count("failed_calls")
+        raise AIUnavailable(f"AI provider unavailable: {reason}")
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+_latencies = deque(maxlen=LATENCY_SAMPLES)
+_client_stats = {"attempts": 0, "failed_attempts": 0, "retries": 0, "failed_calls": 0}
+_client_stats_lock = threading.Lock()
+
+
+def get_ai_breaker() -> CircuitBreaker:
+    global _breaker
+
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker()
+    return _breaker
+
+
+def get_ai_client_stats() -> dict:
+    """
+    Breaker state, attempt counters and provider latency percentiles (ms)
+    """
+    with _client_stats_lock:
+        stats = dict(_client_stats)
+        latencies = sorted(_latencies)
+
+    return {
+        **stats,
+        "breaker": get_ai_breaker().stats(),
+        "latency_ms": {
+            "samples": len(latencies),
+            "p50": _percentile(latencies, 50),
+            "p90": _percentile(latencies, 90),
+            "p99": _percentile(latencies, 99),
+        },
+    }
+
+
+# -------------------------
+# Helper functions
+# -------------------------
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    # Timeouts and connection errors
+    return True
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    # Full jitter, unless the provider says how long to wait
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
         try:
-            response = self.client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=800
-            )
-
-            return response.choices[0].message.content
-
-        except Exception as e:
-            # Graceful fallback
-            return (
-                "AI recommendations are temporarily unavailable. "
-                "Please review the detected issues manually."
-            )
+            return float(retry_after)
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, AI_RETRY_BASE_DELAY * 2 ** attempt)
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, APIStatusError):
+        return f"HTTP {error.status_code}"
+    return type(error).__name__
+
+
+def _record_attempt(seconds: float, ok: bool):
+    with _client_stats_lock:
+        _client_stats["attempts"] += 1
+        if ok:
+            # Failures are mostly timeouts; they would only echo the timeout
+            _latencies.append(seconds * 1000)
+        else:
+            _client_stats["failed_attempts"] += 1
+
+
+def _count(name: str):
+    with _client_stats_lock:
+        _client_stats[name] += 1
+
+
+def _percentile(values: List[float], percent: float) -> Optional[float]:
+    if not values:
+        return None
+    position = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return round(values[position], 1)
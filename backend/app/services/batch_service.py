@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from functools import partial
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Union
+
+from app.config import BATCH_CONCURRENCY, BATCH_PER_HOST, BATCH_AI_ENRICHMENT
+from app.services.scan_service import run_all_scans_async
+from app.utils.url_validator import validate_url, extract_hostname
+from app.services.ai_analysis_service import batched_analysis
+from app.vuln_sources.nvd_scheduler import request_priority, BATCH
+
+logger = logging.getLogger(__name__)
+
+# URLs held back while their host is at `per_host` (only strings, unlike reports)
+MAX_HELD_URLS = 10000
+
+
+async def scan_many(
+    urls: Union[Iterable[str], AsyncIterable[str]],
+    concurrency: int = BATCH_CONCURRENCY,
+    per_host: int = BATCH_PER_HOST,
+    scan=None,
+    indexed: bool = False
+) -> AsyncIterator[dict]:
+    """
+    Scan a (possibly huge) stream of URLs and yield one result per URL
+    in completion order.
+
+    URLs are pulled from `urls` only when a slot frees up, so at most
+    `concurrency` scans (and their reports) are held at any time.
+    At most `per_host` of them target the same host; further URLs of that
+    host wait outside the slots (up to MAX_HELD_URLS), so one busy host
+    never stalls the others.
+    `scan(url)` defaults to run_all_scans_async, rule-based analysis only
+    unless BATCH_AI_ENRICHMENT. With indexed=True, `urls` yields
+    (index, url) pairs instead of bare URLs.
+    """
+    scan = scan or partial(run_all_scans_async, use_llm=BATCH_AI_ENRICHMENT)
+    pending = set()
+    task_hosts: Dict[asyncio.Task, str] = {}
+    running: Dict[str, int] = {}          # host -> scans in progress
+    held: Dict[str, deque] = {}           # host -> (index, url) waiting for that host
+    held_count = 0
+    index = 0
+
+    def start(index: int, url: str, host: str):
+        task = asyncio.create_task(_scan_one(index, url, scan))
+        pending.add(task)
+        task_hosts[task] = host
+
+    def finish(tasks) -> list:
+        # A URL held for the same host takes over the finished scan's slot
+        nonlocal held_count
+        results = []
+
+        for task in tasks:
+            pending.discard(task)
+            results.append(task.result())
+            host = task_hosts.pop(task)
+
+            queue = held.get(host)
+            if queue:
+                start(*queue.popleft(), host)
+                held_count -= 1
+                if not queue:
+                    del held[host]
+            else:
+                running[host] -= 1
+                if not running[host]:
+                    del running[host]
+
+        return results
+
+    async for item in _aiter(urls):
+        if indexed:
+            index, url = item
+        else:
+            url = item
+
+        # Hand back whatever already finished before taking more work
+        for result in finish([t for t in pending if t.done()]):
+            yield result
+
+        while len(pending) >= concurrency or held_count >= MAX_HELD_URLS:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for result in finish(done):
+                yield result
+
+        is_valid, error, normalized_url = validate_url(url)
+        if not is_valid:
+            yield {"index": index, "url": url, "status": "invalid", "error": error}
+        else:
+            host = extract_hostname(normalized_url)
+            if running.get(host, 0) >= per_host:
+                held.setdefault(host, deque()).append((index, normalized_url))
+                held_count += 1
+            else:
+                running[host] = running.get(host, 0) + 1
+                start(index, normalized_url, host)
+
+        if not indexed:
+            index += 1
+
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for result in finish(done):
+            yield result
+
+
+async def to_ndjson(results: AsyncIterable[dict]) -> AsyncIterator[str]:
+    async for result in results:
+        yield json.dumps(result, default=str) + "\n"
+
+
+def parse_url_line(line: str):
+    """
+    One URL from a text/NDJSON line; None for blanks and # comments.
+    JSON lines that are not an object with a string "url" give "", which
+    is reported as an invalid URL like any other.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith(("{", "[", '"')):
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            return ""
+        url = obj.get("url") if isinstance(obj, dict) else None
+        return url if isinstance(url, str) else ""
+    return line
+
+
+# -------------------------
+# Helper functions
+# -------------------------
+
+async def _scan_one(index: int, url: str, scan) -> dict:
+    started = time.perf_counter()
+
+    try:
+        # Batch work yields NVD capacity to interactive scans and
+        # shares multi-scan AI requests with the other batch scans
+        with request_priority(BATCH), batched_analysis():
+            report = await scan(url)
+
+        return {
+            "index": index,
+            "url": url,
+            "status": "ok",
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "report": report,
+        }
+
+    except Exception as e:
+        logger.warning(f"Batch scan of {url} failed: {e}")
+        return {
+            "index": index,
+            "url": url,
+            "status": "failed",
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "error": str(e),
+        }
+
+
+async def _aiter(urls):
+    if hasattr(urls, "__aiter__"):
+        async for url in urls:
+            yield url
+    else:
+        for url in urls:
+            yield url
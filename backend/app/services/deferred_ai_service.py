@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app.config import AI_WORKERS, SCAN_JOB_RETENTION
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class DeferredAnalysis:
+    """
+    A scan whose deterministic report was already returned and whose
+    AI analysis is still running (or finished)
+    """
+
+    def __init__(self, url: str, report: dict):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.status = PENDING
+        self.report = report
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "scan_id": self.id,
+            "url": self.url,
+            "ai_status": self.report.get("ai_status", self.status),
+            "report": self.report,
+            "error": self.error,
+        }
+
+
+class DeferredAIManager:
+    """
+    Runs AI analyses after their scan has returned, on a pool of its own
+    so slow model responses never hold a scan worker. Finished reports
+    are kept for SCAN_JOB_RETENTION seconds.
+    """
+
+    def __init__(self, workers: int = AI_WORKERS):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deferred-ai")
+        self._analyses: Dict[str, DeferredAnalysis] = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._finished = {COMPLETED: 0, FAILED: 0}
+        self._total_seconds = 0.0
+
+    def submit(
+        self,
+        url: str,
+        report: dict,
+        job: Callable[[], dict],
+        on_done: Optional[Callable[[dict], None]] = None
+    ) -> DeferredAnalysis:
+        """
+        Mark `report` as pending (scan_id, ai_status) and run `job` in the
+        background; `job` returns the report with the AI analysis attached.
+        `on_done` receives that final report.
+        """
+        analysis = DeferredAnalysis(url, report)
+        report["scan_id"] = analysis.id
+        report["ai_status"] = PENDING
+
+        with self._lock:
+            self._purge_expired()
+            self._analyses[analysis.id] = analysis
+            self._pending += 1
+
+        self._executor.submit(self._run, analysis, job, on_done)
+        return analysis
+
+    def get(self, scan_id: str) -> Optional[DeferredAnalysis]:
+        with self._lock:
+            return self._analyses.get(scan_id)
+
+    async def wait(self, analysis: DeferredAnalysis, timeout: Optional[float] = None) -> bool:
+        """
+        Wait (without blocking the event loop) until the analysis is attached
+        """
+        return await asyncio.to_thread(analysis.done.wait, timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = sum(self._finished.values())
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "stored": len(self._analyses),
+                "completed": self._finished[COMPLETED],
+                "failed": self._finished[FAILED],
+                "avg_seconds": round(self._total_seconds / finished, 2) if finished else None,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _run(self, analysis: DeferredAnalysis, job: Callable[[], dict], on_done):
+        started = time.perf_counter()
+
+        try:
+            analysis.report = job()
+            analysis.status = COMPLETED
+        except Exception as e:
+            logger.error(f"Deferred AI analysis {analysis.id} failed: {e}")
+            analysis.error = str(e)
+            analysis.report = {**analysis.report, "ai_status": FAILED}
+            analysis.status = FAILED
+        finally:
+            analysis.finished_at = time.time()
+
+            with self._lock:
+                self._pending -= 1
+                self._finished[analysis.status] += 1
+                self._total_seconds += time.perf_counter() - started
+
+            # Callback first, so waiters wake up to an updated report cache
+            if on_done is not None:
+                try:
+                    on_done(analysis.report)
+                except Exception as e:
+                    logger.warning(f"Deferred AI callback failed for {analysis.id}: {e}")
+
+            analysis.done.set()
+
+    def _purge_expired(self):
+        cutoff = time.time() - SCAN_JOB_RETENTION
+        expired = [
+            scan_id for scan_id, analysis in self._analyses.items()
+            if analysis.finished_at is not None and analysis.finished_at < cutoff
+        ]
+        for scan_id in expired:
+            del self._analyses[scan_id]
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_deferred_ai() -> DeferredAIManager:
+    global _manager
+
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = DeferredAIManager()
+    return _manager
@@ -0,0 +1,255 @@
+import codecs
+import hashlib
+import logging
+import re
+import time
+
+import requests
+
+from app.config import REQUEST_TIMEOUT, USER_AGENT, MAX_BODY_BYTES, BODY_READ_DEADLINE
+from app.utils.http_client import get_session
+
+logger = logging.getLogger(__name__)
+
+BODY_CHUNK_SIZE = 64 * 1024
+# How much of the body is inspected for a <meta charset>
+CHARSET_SNIFF_BYTES = 4096
+
+# Headers that change on every response without the page changing
+VOLATILE_HEADERS = {
+    "date", "age", "expires", "etag", "last-modified", "content-length",
+    "connection", "keep-alive", "transfer-encoding", "via", "server-timing",
+    "x-request-id", "x-correlation-id", "x-amzn-requestid", "x-amzn-trace-id",
+    "x-amz-cf-id", "x-amz-cf-pop", "cf-ray", "x-served-by", "x-cache",
+    "x-cache-hits", "x-timer", "x-runtime",
+}
+
+_META_CHARSET_RE = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-:.]+)""",
+    re.IGNORECASE
+)
+
+
+class FetchContext:
+    """
+    Everything a single fetch of the target produced.
+    Built once per scan and shared by every service and detector,
+    so all stages look at the same response.
+    """
+
+    def __init__(
+        self,
+        requested_url: str,
+        response: requests.Response,
+        html: str,
+        body_bytes: int,
+        truncated: bool,
+        encoding: str,
+        elapsed_ms: float
+    ):
+        self.requested_url = requested_url
+        self.final_url = response.url
+        self.status_code = response.status_code
+        self.elapsed_ms = elapsed_ms
+
+        self.redirect_chain = [
+            {"url": r.url, "status_code": r.status_code}
+            for r in response.history
+        ]
+
+        # Case-insensitive view for lookups, raw list keeps duplicates (Set-Cookie, ...)
+        self.headers = response.headers
+        raw = getattr(response.raw, "headers", None)
+        if hasattr(raw, "iteritems"):
+            self.raw_headers = list(raw.iteritems())
+        else:
+            self.raw_headers = list(response.headers.items())
+
+        # Validators for conditional revalidation of a cached report
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+
+        self.cookies = {}
+        for r in [*response.history, response]:
+            for cookie in r.cookies:
+                self.cookies[cookie.name] = cookie.value
+
+        # Body is a capped prefix when `truncated` is set
+        self.html = html
+        self.body_bytes = body_bytes
+        self.truncated = truncated
+        self.encoding = encoding
+        self._response = response
+
+    def headers_hash(self) -> str:
+        """
+        Hash of the response headers minus per-response noise.
+        Cookie values (session ids) are left out, names and flags count.
+        """
+        digest = hashlib.sha256(self.final_url.encode("utf-8"))
+        for name, value in sorted(self.raw_headers, key=lambda item: item[0].lower()):
+            name = name.lower()
+            if name in VOLATILE_HEADERS:
+                continue
+            if name == "set-cookie":
+                cookie, _, attributes = value.partition(";")
+                value = cookie.split("=", 1)[0] + ";" + attributes
+            digest.update(f"\n{name}:{value}".encode("utf-8", "replace"))
+        return digest.hexdigest()[:32]
+
+    def body_hash(self) -> str:
+        return hashlib.sha256(self.html.encode("utf-8", "replace")).hexdigest()[:32]
+
+    def raise_for_status(self):
+        self._response.raise_for_status()
+
+    def summary(self) -> dict:
+        """
+        Small, JSON-safe description for the scan report
+        """
+        return {
+            "requested_url": self.requested_url,
+            "final_url": self.final_url,
+            "status_code": self.status_code,
+            "redirect_chain": self.redirect_chain,
+            "elapsed_ms": self.elapsed_ms,
+            "body_bytes": self.body_bytes,
+            "truncated": self.truncated,
+            "encoding": self.encoding,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+        }
+
+
+def fetch_page(url: str) -> FetchContext:
+    """
+    Fetch the target once (following redirects) and wrap the result.
+    The body is streamed, decompressed incrementally and cut at
+    MAX_BODY_BYTES, so memory per scan stays bounded.
+    """
+    logger.info(f"Fetching {url}")
+
+    started = time.perf_counter()
+    response = get_session("target").get(
+        url,
+        timeout=REQUEST_TIMEOUT,
+        allow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+        stream=True
+    )
+
+    try:
+        html, body_bytes, truncated, encoding = _read_body(response)
+    finally:
+        response.close()
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    if truncated:
+        logger.warning(f"Body of {url} truncated at {body_bytes} bytes")
+
+    return FetchContext(url, response, html, body_bytes, truncated, encoding, elapsed_ms)
+
+
+def page_unchanged(url: str, etag: str = None, last_modified: str = None) -> bool:
+    """
+    Conditional GET: True when the server answers 304 Not Modified.
+    The body of a changed page is not read.
+    """
+    if not etag and not last_modified:
+        return False
+
+    headers = {"User-Agent": USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    response = get_session("target").get(
+        url,
+        timeout=REQUEST_TIMEOUT,
+        allow_redirects=True,
+        headers=headers,
+        stream=True
+    )
+    response.close()
+    return response.status_code == 304
+
+
+# -------------------------
+# Helper functions
+# -------------------------
+
+def _read_body(response: requests.Response):
+    """
+    Stream the (decompressed) body up to the byte budget and decode it
+    incrementally. Returns (text, bytes_read, truncated, encoding).
+    """
+    deadline = time.monotonic() + BODY_READ_DEADLINE
+    # urllib3 undoes gzip/deflate (and br/zstd when their packages are installed)
+    chunks = response.raw.stream(BODY_CHUNK_SIZE, decode_content=True)
+
+    head = b""
+    body_bytes = 0
+    truncated = False
+    decoder = None
+    encoding = None
+    parts = []
+
+    for chunk in chunks:
+        if body_bytes + len(chunk) > MAX_BODY_BYTES:
+            chunk = chunk[:MAX_BODY_BYTES - body_bytes]
+            truncated = True
+
+        body_bytes += len(chunk)
+
+        # Hold back the first bytes until the charset is known
+        if decoder is None:
+            head += chunk
+            if len(head) >= CHARSET_SNIFF_BYTES or truncated:
+                encoding = _detect_encoding(response, head)
+                decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+                parts.append(decoder.decode(head))
+                head = b""
+        else:
+            parts.append(decoder.decode(chunk))
+
+        if truncated:
+            break
+
+        if time.monotonic() > deadline:
+            truncated = True
+            break
+
+    if decoder is None:
+        encoding = _detect_encoding(response, head)
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        parts.append(decoder.decode(head))
+
+    # A cut body may end mid-character: drop the partial sequence
+    parts.append(decoder.decode(b"", final=not truncated))
+
+    return "".join(parts), body_bytes, truncated, encoding
+
+
+def _detect_encoding(response: requests.Response, head: bytes) -> str:
+    """
+    Charset from the Content-Type header, then <meta charset>, then UTF-8
+    """
+    content_type = response.headers.get("Content-Type", "")
+    candidates = []
+
+    if "charset=" in content_type.lower():
+        candidates.append(requests.utils.get_encoding_from_headers(response.headers))
+
+    match = _META_CHARSET_RE.search(head[:CHARSET_SNIFF_BYTES])
+    if match:
+        candidates.append(match.group(1).decode("ascii", "ignore"))
+
+    for candidate in candidates:
+        try:
+            return codecs.lookup(candidate).name
+        except (LookupError, TypeError):
+            continue
+
+    return "utf-8"
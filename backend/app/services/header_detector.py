@@ -1,6 +1,7 @@
 import logging
 import re
 from typing import Dict
+from app.services.html_signals import HTMLSignals
 
 logger = logging.getLogger(__name__)
 
@@ -51,12 +52,12 @@ class HeaderDetector:
             }
         }
     
-    def detect(self, headers: dict) -> Dict:
+    def detect(self, signals: HTMLSignals) -> Dict:
         """
-        Detect technologies from HTTP headers
+        Detect technologies from HTTP headers and cookies
         
         Args:
-            headers: Dictionary of HTTP response headers
+            signals: Pre-extracted page signals (headers and cookies)
             
         Returns:
             {
@@ -88,7 +89,7 @@ class HeaderDetector:
         
         try:
             # Normalize header keys to lowercase
-            headers_lower = {k.lower(): v for k, v in headers.items()}
+            headers_lower = {k.lower(): v for k, v in signals.headers.items()}
             
             # Check Server header
             server_header = headers_lower.get("server", "")
@@ -118,19 +119,25 @@ class HeaderDetector:
                             "detection_method": "powered_by_header"
                         }
             
-            # Check for Cloudflare-specific headers
+            # Check for Cloudflare-specific headers and cookies
             cloudflare_headers = ["cf-ray", "cf-cache-status", "cf-request-id"]
-            for cf_header in cloudflare_headers:
-                if cf_header in headers_lower:
-                    result["cloudflare_detected"] = True
-                    if "Cloudflare" not in result["technologies"]:
-                        result["technologies"]["Cloudflare"] = {
-                            "version": None,
-                            "category": "CDN",
-                            "confidence": 100,
-                            "detection_method": "cf_header"
-                        }
-                    break
+            cloudflare_cookies = ["__cf_bm", "cf_clearance"]
+
+            cf_method = None
+            if any(h in headers_lower for h in cloudflare_headers):
+                cf_method = "cf_header"
+            elif any(c in signals.cookies for c in cloudflare_cookies):
+                cf_method = "cf_cookie"
+
+            if cf_method:
+                result["cloudflare_detected"] = True
+                if "Cloudflare" not in result["technologies"]:
+                    result["technologies"]["Cloudflare"] = {
+                        "version": None,
+                        "category": "CDN",
+                        "confidence": 100,
+                        "detection_method": cf_method
+                    }
             
             # Check X-Generator header (some CMSs use this)
             x_generator = headers_lower.get("x-generator", "")
@@ -2,6 +2,8 @@ import requests
 from urllib.parse import urlparse
 import logging
 
+from app.services.fetch_service import FetchContext, fetch_page
+
 logger = logging.getLogger(__name__)
 
 SECURITY_HEADERS = {
@@ -36,7 +38,11 @@ SECURITY_HEADERS = {
 }
 
 
-def check_security_headers(url: str) -> dict:
+def check_security_headers(url: str, context: FetchContext | None = None) -> dict:
+    """
+    Checks security headers on the target response.
+    Pass the scan's shared FetchContext to avoid another request.
+    """
     logger.info(f"Checking security headers for {url}")
 
     result = {
@@ -56,19 +62,10 @@ def check_security_headers(url: str) -> dict:
             result["severity"] = "Medium"
             return result
 
-        # HEAD first (fast)
-        response = requests.head(
-            url,
-            allow_redirects=True,
-            timeout=10,
-            headers={"User-Agent": "SecurityScanner/1.0"}
-        )
-
-        # Fallback to GET if headers are empty
-        if not response.headers:
-            response = requests.get(url, timeout=10)
+        if context is None:
+            context = fetch_page(url)
 
-        headers = response.headers
+        headers = context.headers
 
         severity_rank = {"Low": 1, "Medium": 2, "High": 3, "Critical": 4}
         highest_severity = "Low"
@@ -0,0 +1,136 @@
+import html as html_lib
+import logging
+import re
+from typing import Dict, List, Optional
+
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Tags the detectors care about; comments are consumed so their content is ignored.
+# Every alternative matches without backtracking: an unclosed comment or tag runs
+# to the end of the page instead of being retried at each later "<".
+_TAG_RE = re.compile(
+    r"<!--.*?(?:-->|\Z)"
+    r"|<(script|link|meta)\b([^>]*)(>?)"
+    r"|</head\s*>",
+    re.IGNORECASE | re.DOTALL
+)
+# Applied to one tag's span; an unclosed quote ends with the span
+_ATTR_RE = re.compile(
+    r"([^\s=/>\"']+)(?:\s*=\s*(?:\"([^\"]*)\"?|'([^']*)'?|([^\s>]+)))?"
+)
+_SCRIPT_END_RE = re.compile(r"</script\s*>", re.IGNORECASE)
+
+INLINE_SCRIPT_SNIPPET_CHARS = 256
+MAX_INLINE_SCRIPTS = 50
+
+
+class HTMLSignals:
+    """
+    Compact bundle of everything the detectors match against,
+    produced by a single pass over the page
+    """
+
+    def __init__(self, url: str, html: str, headers=None, cookies: Optional[Dict] = None):
+        self.url = url
+        self.html = html
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.cookies = dict(cookies or {})
+
+        self.scripts: List[str] = []          # <script src>
+        self.links: List[str] = []            # <link href>
+        self.meta: Dict[str, str] = {}        # <meta name> (lowercased) -> content
+        self.inline_scripts: List[str] = []   # first chars of inline <script> bodies
+
+        # False when parsing stopped at </head>
+        self.complete = True
+
+
+def extract_signals(
+    url: str,
+    html: str,
+    headers=None,
+    cookies: Optional[Dict] = None,
+    head_only: bool = False
+) -> HTMLSignals:
+    """
+    Tokenize the page once and collect detection signals.
+    With head_only=True parsing stops at </head>.
+    """
+    signals = HTMLSignals(url, html, headers, cookies)
+    pos = 0
+
+    while True:
+        match = _TAG_RE.search(html, pos)
+        if match is None:
+            break
+
+        pos = match.end()
+        tag = match.group(1)
+
+        if tag is None:
+            # Comment, or the end of <head>
+            if match.group(0).startswith("</"):
+                if head_only:
+                    signals.complete = False
+                    break
+            continue
+
+        if not match.group(3):
+            # Tag cut off by the end of the page
+            break
+
+        tag = tag.lower()
+        attrs = _parse_attrs(match.group(2))
+
+        if tag == "script":
+            if "src" in attrs:
+                signals.scripts.append(attrs["src"])
+            else:
+                end = _SCRIPT_END_RE.search(html, pos)
+                body_end = end.start() if end else len(html)
+
+                snippet = html[pos:min(body_end, pos + INLINE_SCRIPT_SNIPPET_CHARS)].strip()
+                if snippet and len(signals.inline_scripts) < MAX_INLINE_SCRIPTS:
+                    signals.inline_scripts.append(snippet)
+
+                # Script bodies are opaque: never read tags out of them
+                pos = end.end() if end else len(html)
+
+        elif tag == "link":
+            if "href" in attrs:
+                signals.links.append(attrs["href"])
+
+        elif tag == "meta":
+            if "name" in attrs and "content" in attrs:
+                signals.meta[attrs["name"].lower()] = attrs["content"]
+
+    logger.debug(
+        f"Extracted {len(signals.scripts)} scripts, {len(signals.links)} links, "
+        f"{len(signals.meta)} meta tags from {url}"
+    )
+    return signals
+
+
+# -------------------------
+# Helper functions
+# -------------------------
+
+def _parse_attrs(raw: str) -> Dict[str, str]:
+    attrs = {}
+
+    for match in _ATTR_RE.finditer(raw):
+        name = match.group(1).lower()
+        if name in attrs:
+            continue
+
+        value = match.group(2)
+        if value is None:
+            value = match.group(3)
+        if value is None:
+            value = match.group(4)
+
+        attrs[name] = html_lib.unescape(value) if value else ""
+
+    return attrs
@@ -3,6 +3,7 @@ from typing import Dict
 from app.services.wappalyzer_detector import WappalyzerDetector
 from app.services.regex_detector import RegexDetector
 from app.services.header_detector import HeaderDetector
+from app.services.html_signals import HTMLSignals, extract_signals
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +19,31 @@ class HybridTechnologyDetector:
         self.regex = RegexDetector()
         self.header = HeaderDetector()
 
+    def detect_from_context(self, context) -> Dict:
+        """
+        Detect technologies from the scan's shared FetchContext
+        """
+        signals = extract_signals(
+            context.final_url,
+            context.html,
+            context.headers,
+            context.cookies,
+            head_only=self._head_only()
+        )
+        return self.detect_signals(signals)
+
     def detect(self, url: str, html: str, headers: dict) -> Dict:
+        signals = extract_signals(url, html, headers, head_only=self._head_only())
+        return self.detect_signals(signals)
+
+    def _head_only(self) -> bool:
+        # Without Wappalyzer only <meta> tags are read, and those live in <head>
+        return not self.wappalyzer.is_available()
+
+    def detect_signals(self, signals: HTMLSignals) -> Dict:
+        """
+        Run every detector against ONE shared signal bundle
+        """
         result = {
             "success": False,
             "technologies": {},
@@ -37,7 +62,7 @@ class HybridTechnologyDetector:
             all_technologies = {}
 
             # 1️⃣ Wappalyzer
-            wap = self.wappalyzer.detect(url, html, headers)
+            wap = self.wappalyzer.detect(signals)
             if wap.get("success"):
                 result["detection_summary"]["wappalyzer_count"] = wap["count"]
                 result["detection_summary"]["methods_used"].append("wappalyzer")
@@ -47,7 +72,7 @@ class HybridTechnologyDetector:
                     all_technologies[name] = data
 
             # 2️⃣ Regex
-            regex = self.regex.detect(url, html, headers)
+            regex = self.regex.detect(signals)
             if regex.get("success"):
                 result["detection_summary"]["regex_count"] = regex["count"]
                 result["detection_summary"]["methods_used"].append("regex")
@@ -62,7 +87,7 @@ class HybridTechnologyDetector:
                         all_technologies[name] = data
 
             # 3️⃣ Headers
-            header = self.header.detect(headers)
+            header = self.header.detect(signals)
             if header.get("success"):
                 result["detection_summary"]["header_count"] = header["count"]
                 result["detection_summary"]["methods_used"].append("headers")
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import socket
+import threading
+from typing import Any, List, Optional
+
+
+class StageReuse:
+    """
+    Decides, stage by stage, whether a section of the previous report can
+    be reused. Each stage fingerprints its inputs; a stage whose fingerprint
+    matches the one stored with the previous report returns the old section
+    instead of running again. Drop a stage from the previous fingerprints
+    to force it to run.
+    """
+
+    def __init__(self, previous: Optional[dict] = None):
+        self.previous = previous or {}
+        self._old = self.previous.get("fingerprints") or {}
+        self.fingerprints = {}
+        self._reused = []
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, *inputs: Any) -> Optional[str]:
+        """
+        Remember the fingerprint of `inputs` for `stage`; unknown inputs
+        (None) give no fingerprint
+        """
+        fingerprint = fingerprint_of(inputs) if all(i is not None for i in inputs) else None
+        with self._lock:
+            self.fingerprints[stage] = fingerprint
+        return fingerprint
+
+    def unchanged(self, stage: str, *inputs: Any) -> bool:
+        """
+        record() and say whether the previous section may be used instead
+        """
+        fingerprint = self.record(stage, *inputs)
+        if fingerprint is None or self._old.get(stage) != fingerprint:
+            return False
+
+        with self._lock:
+            self._reused.append(stage)
+        return True
+
+    def has(self, stage: str) -> bool:
+        """
+        The previous report has a reusable section for `stage`
+        """
+        return self._old.get(stage) is not None
+
+    @property
+    def reused(self) -> List[str]:
+        with self._lock:
+            return list(self._reused)
+
+
+def fingerprint_of(value: Any) -> str:
+    """
+    Short stable hash of any JSON-like value
+    """
+    encoded = json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def resolve_addresses(host: str) -> Optional[List[str]]:
+    """
+    Sorted addresses `host` resolves to, or None when resolution fails
+    """
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        return None
+    return sorted({info[4][0] for info in infos})
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.config import SCAN_WORKERS, SCAN_QUEUE_LIMIT, SCAN_JOB_RETENTION
+from app.services.scan_service import SCAN_STAGES
+from app.services.report_cache import scan_with_cache
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """
+    Too many jobs are waiting for a worker
+    """
+
+
+class ScanJob:
+    """
+    One background scan: status, per-stage progress and the final report
+    """
+
+    def __init__(self, url: str, force: bool = False, defer_ai: bool = False, use_llm: bool = True):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.force = force
+        self.defer_ai = defer_ai
+        self.use_llm = use_llm
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stages = {name: {"status": "pending", "elapsed_ms": None} for name in SCAN_STAGES}
+        self.report: Optional[dict] = None
+        self.error: Optional[str] = None
+        self._stage_started: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def on_stage(self, name: str, state: str, result=None):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"status": "pending", "elapsed_ms": None})
+            stage["status"] = state
+
+            if state == "running":
+                self._stage_started[name] = time.perf_counter()
+            elif name in self._stage_started:
+                stage["elapsed_ms"] = round((time.perf_counter() - self._stage_started[name]) * 1000, 1)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            done = sum(1 for stage in self.stages.values() if stage["status"] in ("done", "cached"))
+            return {
+                "job_id": self.id,
+                "url": self.url,
+                "status": self.status,
+                "created_at": _iso(self.created_at),
+                "started_at": _iso(self.started_at),
+                "finished_at": _iso(self.finished_at),
+                "progress": {
+                    "completed": done,
+                    "total": len(self.stages),
+                    "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                },
+                "report": self.report,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    """
+    Runs scans on a bounded worker pool and keeps their results for
+    SCAN_JOB_RETENTION seconds
+    """
+
+    def __init__(self, workers: int = SCAN_WORKERS, queue_limit: int = SCAN_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan-job")
+        self._jobs: Dict[str, ScanJob] = {}
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._finished = {COMPLETED: 0, FAILED: 0}
+        self._total_seconds = 0.0
+
+    def submit(self, url: str, force: bool = False, defer_ai: bool = False, use_llm: bool = True) -> ScanJob:
+        with self._lock:
+            self._purge_expired()
+
+            if self._queued >= self.queue_limit:
+                raise JobQueueFull(f"{self._queued} scans are already waiting")
+
+            job = ScanJob(url, force=force, defer_ai=defer_ai, use_llm=use_llm)
+            self._jobs[job.id] = job
+            self._queued += 1
+
+        self._executor.submit(self._run, job)
+        logger.info(f"Scan job {job.id} queued for {url}")
+        return job
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = sum(self._finished.values())
+            return {
+                "workers": self.workers,
+                "busy_workers": self._running,
+                "utilization": round(self._running / self.workers, 2) if self.workers else None,
+                "queue_depth": self._queued,
+                "queue_limit": self.queue_limit,
+                "stored_jobs": len(self._jobs),
+                "completed": self._finished[COMPLETED],
+                "failed": self._finished[FAILED],
+                "avg_scan_seconds": round(self._total_seconds / finished, 2) if finished else None,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _run(self, job: ScanJob):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+
+        job.status = RUNNING
+        job.started_at = time.time()
+
+        try:
+            job.report = asyncio.run(
+                scan_with_cache(
+                    job.url,
+                    force=job.force,
+                    on_stage=job.on_stage,
+                    defer_ai=job.defer_ai,
+                    use_llm=job.use_llm
+                )
+            )
+            job.status = COMPLETED
+        except Exception as e:
+            logger.error(f"Scan job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+            with self._lock:
+                self._running -= 1
+                self._finished[job.status] += 1
+                self._total_seconds += job.finished_at - job.started_at
+
+    def _purge_expired(self):
+        cutoff = time.time() - SCAN_JOB_RETENTION
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager()
+    return _manager
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
@@ -1,7 +1,18 @@
-import requests
 import logging
-from functools import lru_cache
-from app.config import NVD_API_KEY
+from app.config import (
+    NVD_API_KEY,
+    NVD_MODE,
+    NVD_MAX_QUEUE_WAIT,
+    VERSION_FILTER_RESULTS,
+    VULN_CACHE_TTL,
+    VULN_CACHE_STALE_TTL,
+    VULN_CACHE_NEGATIVE_TTL,
+)
+from app.utils.http_client import get_session
+from app.utils.sqlite_cache import get_cache, CachedLookupError
+from app.vuln_sources.nvd_mirror import get_mirror, product_candidates
+from app.vuln_sources.version_ranges import parse_version, cve_version_ranges
+from app.vuln_sources.nvd_scheduler import get_scheduler, NVDBusy
 
 logger = logging.getLogger(__name__)
 
@@ -14,39 +25,81 @@ SKIP_NVD_PRODUCTS = {
     "Cloudflare",
 }
 
-@lru_cache(maxsize=100)
-def nvd_fallback_by_product(product_name: str, max_results: int = 5):
+
+class NVDUnavailable(Exception):
+    """
+    Lookup failed; the message is safe to show to users
+    """
+
+
+def nvd_fallback_by_product(product_name: str, max_results: int = 5, version: str | None = None):
+    if product_name in SKIP_NVD_PRODUCTS:
+        return {
+            "status": "informational",
+            "message": "Vulnerability scanning not applicable for this technology."
+        }
+
+    if NVD_MODE == "mirror":
+        return _lookup_product_in_mirror(product_name, max_results, version)
+
+    try:
+        return get_cache("nvd_products").get_or_load(
+            f"{product_name.lower()}|{max_results}|{(version or '').lower()}",
+            lambda: _lookup_product(product_name, max_results, version),
+            ttl=VULN_CACHE_TTL,
+            negative_ttl=VULN_CACHE_NEGATIVE_TTL,
+            stale_ttl=VULN_CACHE_STALE_TTL,
+            transient=(NVDBusy,)
+        )
+
+    except (NVDUnavailable, CachedLookupError) as e:
+        return {
+            "status": "informational",
+            "message": str(e)
+        }
+
+    except NVDBusy:
+        # Not cached: the next scan retries once the queue has drained
+        logger.info(f"NVD queue busy, skipped {product_name}")
+        return {
+            "status": "informational",
+            "message": "Vulnerability data temporarily unavailable."
+        }
+
+
+def _lookup_product(product_name: str, max_results: int, version: str | None = None):
+    version_key = parse_version(version)
+    products = product_candidates(product_name)
+
     headers = {}
     if NVD_API_KEY:
         headers["apiKey"] = NVD_API_KEY
 
+    params = {
+        "keywordSearch": product_name.replace(" ", "+"),
+        "resultsPerPage": max_results if version_key is None else VERSION_FILTER_RESULTS
+    }
+
     try:
-        response = requests.get(
-            NVD_API_URL,
-            params={
-                "keywordSearch": product_name.replace(" ", "+"),
-                "resultsPerPage": max_results
-            },
-            headers=headers,
-            timeout=10
+        response = get_scheduler().submit(
+            ("keywordSearch", params["keywordSearch"], params["resultsPerPage"]),
+            lambda: get_session("nvd").get(
+                NVD_API_URL,
+                params=params,
+                headers=headers,
+                timeout=10
+            ),
+            max_wait=NVD_MAX_QUEUE_WAIT
         )
-        
+
         # 🚫 Never expose HTTP failure
         if response.status_code != 200:
             logger.info(f"NVD unavailable for {product_name}")
-            return {
-                "status": "informational",
-                "message": "No confirmed CVEs available from NVD."
-            }
+            raise NVDUnavailable("No confirmed CVEs available from NVD.")
 
         data = response.json()
         vulns = data.get("vulnerabilities", [])
-        
-        if product_name in SKIP_NVD_PRODUCTS:
-         return {
-             "status": "informational",
-             "message": "Vulnerability scanning not applicable for this technology."
-         }
+
         # ✅ Valid response but no CVEs
         if not vulns:
             return {
@@ -59,6 +112,13 @@ def nvd_fallback_by_product(product_name: str, max_results: int = 5):
 
         for item in vulns:
             cve = item.get("cve", {})
+
+            # ⚠️ Skip CVEs whose ranges for this product exclude the detected version
+            if version_key is not None:
+                ranges = cve_version_ranges(cve, products)
+                if ranges is not None and not any(r.contains(version_key) for r in ranges):
+                    continue
+
             cves.append(cve.get("id"))
 
             for config in cve.get("configurations", []):
@@ -75,16 +135,45 @@ def nvd_fallback_by_product(product_name: str, max_results: int = 5):
                         if version_end:
                             affected_versions.add(version_end)
 
+        if not cves:
+            return {
+                "status": "informational",
+                "message": "No known CVEs listed for this technology."
+            }
+
         return {
             "status": "potential",
             "affected_versions": sorted(affected_versions),
-            "cves": cves[:5]
+            "cves": cves[:max_results]
         }
 
+    except (NVDUnavailable, NVDBusy):
+        raise
+
     except Exception:
-        # 🚫 Never leak exception details
+        # 🚫 Never leak exception details (cached briefly as a negative entry)
         logger.info(f"NVD lookup skipped for {product_name}")
+        raise NVDUnavailable("Vulnerability data unavailable.")
+
+
+def _lookup_product_in_mirror(product_name: str, max_results: int, version: str | None = None):
+    try:
+        summary = get_mirror().product_summary(product_name, max_results, version)
+    except Exception:
+        logger.info(f"NVD mirror lookup skipped for {product_name}")
         return {
             "status": "informational",
             "message": "Vulnerability data unavailable."
         }
+
+    if not summary["cves"]:
+        return {
+            "status": "informational",
+            "message": "No known CVEs listed for this technology."
+        }
+
+    return {
+        "status": "potential",
+        "affected_versions": summary["affected_versions"],
+        "cves": summary["cves"]
+    }
@@ -1,7 +1,7 @@
 import re
 import logging
-from typing import Dict, List, Optional
-from bs4 import BeautifulSoup
+from typing import Dict, List, Optional, Tuple
+from app.services.html_signals import HTMLSignals
 
 logger = logging.getLogger(__name__)
 
@@ -345,6 +345,242 @@ TECH_PATTERNS = {
 }
 
 
+# Characters that end a literal prefix
+_REGEX_META = set(".^$*+?{}[]()|")
+# Quantifiers that make the preceding character optional
+_OPTIONAL_QUANTIFIERS = set("?*{")
+# Characters IGNORECASE matches to an ASCII letter where lower() does not
+# (lower() of "İ" even changes the length)
+_CASE_TRAPS = {0x130: "i", 0x131: "i", 0x17F: "s"}
+# Documents are scanned in windows, never lowercased as a whole
+_SCAN_CHUNK_SIZE = 1 << 18
+
+
+class PatternEngine:
+    """
+    Single-pass matcher for TECH_PATTERNS.
+
+    Every pattern is reduced to the literal text all of its matches must
+    start with. The literals are compiled into one trie-shaped regex and
+    found in a single scan; the full (precompiled) pattern is then only
+    tried, anchored, where its literal was seen. Patterns without a usable
+    literal fall back to a regular search.
+    """
+
+    def __init__(self, tech_patterns: Dict):
+        # (tech_name, compiled_pattern, has_version_group)
+        self.entries: List[Tuple[str, re.Pattern, bool]] = []
+        self.by_literal: Dict[str, List[int]] = {}
+        self.unanchored: List[int] = []
+
+        for tech_name, tech_info in tech_patterns.items():
+            for pattern in tech_info["patterns"]:
+                compiled = re.compile(pattern, re.IGNORECASE)
+                index = len(self.entries)
+                self.entries.append((tech_name, compiled, compiled.groups > 0))
+
+                literals = _literal_prefixes(pattern)
+                if literals is None:
+                    self.unanchored.append(index)
+                    continue
+
+                for literal in literals:
+                    self.by_literal.setdefault(literal, []).append(index)
+
+        # A hit on a literal is also a hit on every literal that prefixes it
+        self.entries_for_hit: Dict[str, List[int]] = {}
+        for literal in self.by_literal:
+            indexes = []
+            for other, other_indexes in self.by_literal.items():
+                if literal.startswith(other):
+                    indexes.extend(other_indexes)
+            self.entries_for_hit[literal] = sorted(set(indexes))
+
+        # The trie regex always reports the longest literal at a position
+        self.scanner = re.compile(_trie_pattern(self.by_literal))
+        self.overlap = max((len(literal) for literal in self.by_literal), default=1) - 1
+
+    def scan(self, html: str) -> Dict[int, List[re.Match]]:
+        """
+        Returns {entry_index: [matches in document order]}.
+        Patterns without a version group stop at their first match.
+        """
+        matches: Dict[int, List[re.Match]] = {}
+        done = set()
+
+        for chunk_start in range(0, len(html), _SCAN_CHUNK_SIZE):
+            chunk_end = min(chunk_start + _SCAN_CHUNK_SIZE, len(html))
+            window = html[chunk_start:chunk_end + self.overlap]
+
+            for offset, literal in self._find_literals(window, chunk_end - chunk_start):
+                start = chunk_start + offset
+
+                for index in self.entries_for_hit[literal]:
+                    if index in done:
+                        continue
+
+                    _, compiled, has_version = self.entries[index]
+                    match = compiled.match(html, start)
+                    if match is None:
+                        continue
+
+                    matches.setdefault(index, []).append(match)
+                    if not has_version:
+                        done.add(index)
+
+        for index in self.unanchored:
+            _, compiled, has_version = self.entries[index]
+            if has_version:
+                found = list(compiled.finditer(html))
+            else:
+                first = compiled.search(html)
+                found = [first] if first else []
+            if found:
+                matches[index] = found
+
+        return matches
+
+    def _find_literals(self, window: str, limit: int):
+        """
+        Yields (offset, literal) for every literal starting before `limit`
+        """
+        # Literals are lowercase ASCII: a case-sensitive scan over the
+        # lowered window finds exactly what IGNORECASE would, much faster
+        if window.isascii():
+            text = window.lower()
+        else:
+            text = window.translate(_CASE_TRAPS).lower()
+
+        search = self.scanner.search
+        pos = 0
+
+        while True:
+            hit = search(text, pos)
+            if hit is None or hit.start() >= limit:
+                return
+
+            yield hit.start(), hit.group()
+            pos = hit.start() + 1
+
+
+def _trie_pattern(literals) -> str:
+    """
+    Regex source matching any of `literals`, factored as a trie so the
+    engine tests one branch per distinct character instead of every literal
+    """
+    trie: Dict = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [
+            re.escape(char) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail: the longest literal wins
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _literal_prefixes(pattern: str) -> Optional[List[str]]:
+    """
+    Lowercased literal text that every match of `pattern` starts with,
+    one per top-level alternative. None when any alternative has none.
+    """
+    prefixes = []
+
+    for branch in _split_top_level(pattern):
+        literal = []
+        i = 0
+
+        while i < len(branch):
+            char = branch[i]
+
+            if char == "\\":
+                escaped = branch[i + 1] if i + 1 < len(branch) else ""
+                # \d, \s, \w, \b ... are classes/anchors, not literals
+                if not escaped or escaped.isalnum():
+                    break
+                next_index = i + 2
+                char = escaped
+            elif char in _REGEX_META:
+                break
+            else:
+                next_index = i + 1
+
+            # "ab?" -> only "a" is guaranteed
+            if next_index < len(branch) and branch[next_index] in _OPTIONAL_QUANTIFIERS:
+                break
+
+            literal.append(char)
+            i = next_index
+
+            if i < len(branch) and branch[i] == "+":
+                break
+
+        literal = "".join(literal)
+        # The fast scan relies on ASCII literals (see _CASE_TRAPS)
+        if not literal or not literal.isascii():
+            return None
+
+        prefixes.append(literal.lower())
+
+    return prefixes
+
+
+def _split_top_level(pattern: str) -> List[str]:
+    """
+    Split a pattern on "|" outside of groups and character classes
+    """
+    branches = []
+    depth = 0
+    in_class = False
+    current = []
+    i = 0
+
+    while i < len(pattern):
+        char = pattern[i]
+
+        if char == "\\":
+            current.append(pattern[i:i + 2])
+            i += 2
+            continue
+
+        if in_class:
+            if char == "]":
+                in_class = False
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            branches.append("".join(current))
+            current = []
+            i += 1
+            continue
+
+        current.append(char)
+        i += 1
+
+    branches.append("".join(current))
+    return branches
+
+
+# Compiled once per process, shared by every RegexDetector
+_ENGINE = PatternEngine(TECH_PATTERNS)
+
+
 class RegexDetector:
     """
     Fallback technology detector using regex patterns
@@ -353,15 +589,14 @@ class RegexDetector:
     
     def __init__(self):
         self.patterns = TECH_PATTERNS
+        self.engine = _ENGINE
     
-    def detect(self, url: str, html: str, headers: dict) -> Dict:
+    def detect(self, signals: HTMLSignals) -> Dict:
         """
         Detect technologies using regex patterns
         
         Args:
-            url: Target URL
-            html: HTML content (lowercase for matching)
-            headers: HTTP response headers
+            signals: Pre-extracted page signals (html and meta tags)
             
         Returns:
             {
@@ -370,6 +605,7 @@ class RegexDetector:
                 "technologies": {
                     "jQuery": {
                         "version": "3.6.0",
+                        "all_versions": ["3.6.0"],
                         "category": "JavaScript Library",
                         "confidence": 95,
                         "detection_method": "regex"
@@ -389,56 +625,58 @@ class RegexDetector:
             "error": None
         }
         
+        url = signals.url
+
         try:
-            html_lower = html.lower()
-            
-            # Detect from HTML patterns
+            # One pass over the document for every technology
+            matches = self.engine.scan(signals.html)
+            tech_matches: Dict[str, List[Tuple[int, List[re.Match]]]] = {}
+            for index, found in sorted(matches.items()):
+                tech_name = self.engine.entries[index][0]
+                tech_matches.setdefault(tech_name, []).append((index, found))
+
             for tech_name, tech_info in self.patterns.items():
-                patterns = tech_info["patterns"]
-                category = tech_info["category"]
-                confidence = tech_info.get("confidence", 80)
-                
+                if tech_name not in tech_matches:
+                    continue
+
                 version = None
-                detected = False
-                
-                for pattern in patterns:
-                    match = re.search(pattern, html_lower, re.IGNORECASE)
-                    if match:
-                        detected = True
-                        # Try to extract version if pattern has capturing group
-                        if match.groups():
-                            version = match.group(1)
-                        break
-                
-                if detected:
-                    result["technologies"][tech_name] = {
-                        "version": version,
-                        "category": category,
-                        "confidence": confidence,
-                        "detection_method": "regex"
-                    }
+                all_versions = []
+
+                # First matching pattern decides the version, as before;
+                # every version-bearing pattern still contributes evidence
+                for position, (index, found) in enumerate(tech_matches[tech_name]):
+                    has_version = self.engine.entries[index][2]
+                    if position == 0 and has_version:
+                        version = found[0].group(1)
+
+                    if has_version:
+                        for match in found:
+                            candidate = match.group(1)
+                            if candidate and candidate not in all_versions:
+                                all_versions.append(candidate)
+
+                result["technologies"][tech_name] = {
+                    "version": version,
+                    "all_versions": all_versions,
+                    "category": tech_info["category"],
+                    "confidence": tech_info.get("confidence", 80),
+                    "detection_method": "regex"
+                }
             
-            # Detect from meta tags using BeautifulSoup
-            try:
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Check generator meta tag
-                generator = soup.find("meta", attrs={"name": "generator"})
-                if generator:
-                    content = generator.get("content", "")
-                    # Parse generator content (e.g., "WordPress 6.3")
-                    for tech in ["WordPress", "Joomla", "Drupal", "Magento"]:
-                        if tech.lower() in content.lower():
-                            version_match = re.search(r'(\d+\.\d+(?:\.\d+)?)', content)
-                            if tech not in result["technologies"]:
-                                result["technologies"][tech] = {
-                                    "version": version_match.group(1) if version_match else None,
-                                    "category": "CMS",
-                                    "confidence": 100,
-                                    "detection_method": "meta_tag"
-                                }
-            except Exception as e:
-                logger.debug(f"BeautifulSoup parsing failed: {e}")
+            # Detect from the generator meta tag (already extracted)
+            content = signals.meta.get("generator", "")
+            if content:
+                # Parse generator content (e.g., "WordPress 6.3")
+                for tech in ["WordPress", "Joomla", "Drupal", "Magento"]:
+                    if tech.lower() in content.lower():
+                        version_match = re.search(r'(\d+\.\d+(?:\.\d+)?)', content)
+                        if tech not in result["technologies"]:
+                            result["technologies"][tech] = {
+                                "version": version_match.group(1) if version_match else None,
+                                "category": "CMS",
+                                "confidence": 100,
+                                "detection_method": "meta_tag"
+                            }
             
             result["success"] = True
             result["count"] = len(result["technologies"])
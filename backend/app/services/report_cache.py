@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+import requests
+
+from app.config import (
+    REPORT_CACHE_ENABLED,
+    REPORT_TTL_PAGE,
+    REPORT_TTL_VULNS,
+    REPORT_TTL_NMAP,
+    REPORT_TTL_SSL_MAX,
+    REPORT_SSL_EXPIRY_MARGIN,
+    REPORT_CACHE_RETENTION,
+    VULN_CACHE_NEGATIVE_TTL,
+)
+from app.services.fetch_service import page_unchanged
+from app.services.scan_service import run_all_scans_async, SCAN_STAGES
+from app.utils.sqlite_cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+# Report sections that come from the target page; revalidated together
+PAGE_STAGES = ("fetch", "headers", "technology")
+# Reusing these proves they are current (same page, same certificate), so their TTL restarts.
+# Other reused sections (nmap, CVE data) keep the expiry of the report they came from.
+VERIFIED_ON_REUSE = PAGE_STAGES + ("ssl",)
+
+HIT = "hit"
+REVALIDATED = "revalidated"
+MISS = "miss"
+INCREMENTAL = "incremental"
+FORCED = "forced"
+
+# ai_status of reports that do not answer a `use_llm` request: rules only,
+# analysis still running (or lost with its process), or the analysis failed
+WITHOUT_ANALYSIS = ("rules", "pending", "failed", "unavailable")
+
+
+class ReportCache:
+    """
+    Full scan reports keyed on the normalized URL. Every section expires
+    on its own schedule; the report is served while all of them are valid.
+    Expired page sections are renewed by a conditional GET (304). Otherwise
+    the URL is rescanned incrementally: stages whose inputs did not change
+    (and whose section has not expired) reuse the previous result.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or get_cache("scan_reports")
+        self._lock = threading.Lock()
+        self._counters = {HIT: 0, REVALIDATED: 0, INCREMENTAL: 0, MISS: 0, FORCED: 0, "store_errors": 0}
+
+    async def scan(
+        self,
+        url: str,
+        force: bool = False,
+        on_stage=None,
+        defer_ai: bool = False,
+        use_llm: bool = True
+    ) -> dict:
+        """
+        Cached report for `url` (already normalized), or a fresh scan.
+        `force` skips the lookup and any reuse, but still stores the new report.
+        With `defer_ai` the pending report is stored first and replaced
+        once the analysis is attached. A report without an analysis (rules
+        only, pending, failed) does not answer a `use_llm` request; its
+        sections are reused and only the AI runs.
+        """
+        previous, expires = None, {}
+
+        if not force:
+            cached = await asyncio.to_thread(self.lookup, url)
+            if cached is not None and use_llm and cached[0].get("ai_status") in WITHOUT_ANALYSIS:
+                cached = None
+
+            if cached is not None:
+                report, status = cached
+                self._count(status)
+                if on_stage is not None:
+                    for name in SCAN_STAGES:
+                        on_stage(name, "cached", None)
+                return report
+
+            previous, expires = await asyncio.to_thread(self.previous, url) or (None, {})
+
+        status = FORCED if force else INCREMENTAL if previous else MISS
+        self._count(status)
+
+        # The final report (deferred AI) may arrive before the pending one is stored
+        store_lock = threading.Lock()
+        final_stored = []
+
+        def store(scanned: dict, final: bool):
+            carried = {
+                name: expires[name] for name in scanned.get("reused_stages", [])
+                if name in expires and name not in VERIFIED_ON_REUSE
+            }
+            with store_lock:
+                if not final_stored:
+                    self.store(url, scanned, carried)
+                if final:
+                    final_stored.append(True)
+
+        report = await run_all_scans_async(
+            url,
+            on_stage=on_stage,
+            previous=previous,
+            defer_ai=defer_ai,
+            on_ai_done=lambda final: store(final, True),
+            use_llm=use_llm
+        )
+        await asyncio.to_thread(store, report, report.get("ai_status") != "pending")
+
+        return {**report, "cache": {"status": status, "age_s": 0}}
+
+    def lookup(self, url: str) -> Optional[Tuple[dict, str]]:
+        """
+        (report, hit|revalidated) when every section is still valid
+        """
+        cached = self.cache.get(url)
+        if cached is None:
+            return None
+
+        entry, _ = cached
+        now = time.time()
+        expired = {name for name, expires_at in entry["expires"].items() if expires_at <= now}
+        status = HIT
+
+        if expired:
+            if not expired <= set(PAGE_STAGES) or not self._revalidate(url, entry):
+                return None
+
+            for name in PAGE_STAGES:
+                entry["expires"][name] = now + REPORT_TTL_PAGE
+            self._save(url, entry)
+            status = REVALIDATED
+
+        stored_at = entry["stored_at"]
+        return {
+            **entry["report"],
+            "cache": {
+                "status": status,
+                "age_s": round(now - stored_at, 1),
+                "stored_at": datetime.fromtimestamp(stored_at, timezone.utc).isoformat(),
+            },
+        }, status
+
+    def previous(self, url: str) -> Optional[Tuple[dict, dict]]:
+        """
+        (report, section expiries) last stored for `url`. The report loses
+        the fingerprints of sections past their TTL so those stages run
+        again; page sections are compared by content and never expire here.
+        """
+        cached = self.cache.get(url)
+        if cached is None:
+            return None
+
+        entry, _ = cached
+        now = time.time()
+        fingerprints = dict(entry["report"].get("fingerprints") or {})
+
+        for name, expires_at in entry["expires"].items():
+            if expires_at <= now and name not in PAGE_STAGES:
+                fingerprints.pop(name, None)
+
+        return {**entry["report"], "fingerprints": fingerprints}, entry["expires"]
+
+    def store(self, url: str, report: dict, expires: Optional[dict] = None):
+        """
+        `expires` overrides the computed expiry of some sections
+        """
+        now = time.time()
+        self._save(url, {
+            "report": report,
+            "stored_at": now,
+            "expires": {**_section_expiries(report, now), **(expires or {})},
+        })
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+
+        lookups = counters[HIT] + counters[REVALIDATED] + counters[INCREMENTAL] + counters[MISS]
+        counters["hit_ratio"] = round((counters[HIT] + counters[REVALIDATED]) / lookups, 3) if lookups else None
+        return counters
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _revalidate(self, url: str, entry: dict) -> bool:
+        fetch = entry["report"].get("fetch") or {}
+        try:
+            return page_unchanged(url, fetch.get("etag"), fetch.get("last_modified"))
+        except requests.RequestException as e:
+            logger.info(f"Revalidation of {url} failed: {e}")
+            return False
+
+    def _save(self, url: str, entry: dict):
+        # Outlives its sections so later rescans can reuse parts of it;
+        # a failed write only costs a full rescan
+        ttl = max(REPORT_CACHE_RETENTION, max(entry["expires"].values()) - time.time())
+        try:
+            self.cache.set(url, entry, ttl)
+        except Exception as e:
+            self._count("store_errors")
+            logger.warning(f"Could not cache report for {url}: {e}")
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+
+_report_cache = None
+_report_cache_lock = threading.Lock()
+
+
+def get_report_cache() -> ReportCache:
+    global _report_cache
+
+    if _report_cache is None:
+        with _report_cache_lock:
+            if _report_cache is None:
+                _report_cache = ReportCache()
+    return _report_cache
+
+
+async def scan_with_cache(
+    url: str,
+    force: bool = False,
+    on_stage=None,
+    defer_ai: bool = False,
+    use_llm: bool = True
+) -> dict:
+    """
+    run_all_scans_async behind the report cache (when REPORT_CACHE_ENABLED)
+    """
+    if not REPORT_CACHE_ENABLED:
+        return await run_all_scans_async(url, on_stage=on_stage, defer_ai=defer_ai, use_llm=use_llm)
+    return await get_report_cache().scan(
+        url,
+        force=force,
+        on_stage=on_stage,
+        defer_ai=defer_ai,
+        use_llm=use_llm
+    )
+
+
+def run_cached_scan(url: str, force: bool = False, defer_ai: bool = False, use_llm: bool = True) -> dict:
+    return asyncio.run(scan_with_cache(url, force=force, defer_ai=defer_ai, use_llm=use_llm))
+
+
+# -------------------------
+# Helper functions
+# -------------------------
+
+def _section_expiries(report: dict, now: float) -> dict:
+    expires = {name: now + REPORT_TTL_PAGE for name in PAGE_STAGES}
+    expires["ssl"] = _ssl_expiry(report.get("ssl") or {}, now)
+    expires["nmap"] = now + REPORT_TTL_NMAP
+
+    # Lookups that failed (NVD busy, timeouts) are retried as soon as the vulnerability cache allows
+    vulnerabilities = report.get("vulnerabilities") or []
+    if any("error" in entry for entry in vulnerabilities):
+        expires["vulnerabilities"] = now + VULN_CACHE_NEGATIVE_TTL
+    else:
+        expires["vulnerabilities"] = now + REPORT_TTL_VULNS
+
+    return expires
+
+
+def _ssl_expiry(ssl: dict, now: float) -> float:
+    # Problems are re-checked as often as the page; a good certificate until close to its expiry
+    if not ssl.get("valid") or not ssl.get("expiry_date"):
+        return now + REPORT_TTL_PAGE
+
+    try:
+        not_after = datetime.fromisoformat(ssl["expiry_date"]).timestamp()
+    except (TypeError, ValueError):
+        return now + REPORT_TTL_PAGE
+
+    return min(now + REPORT_TTL_SSL_MAX, not_after - REPORT_SSL_EXPIRY_MARGIN)
@@ -0,0 +1,217 @@
+from typing import Iterator, List
+
+from app.data.owasp_remediation import OWASP_REMEDIATION
+from app.data.owasp_rules import OWASP_RULES
+from app.services.header_service import SECURITY_HEADERS
+from app.services.severity_service import SEVERITY_ORDER
+
+CONFIDENCE_ORDER = {"Informational": 0, "Potential": 1, "Confirmed": 2}
+
+
+def evaluate_rules(sections: dict) -> dict:
+    """
+    OWASP Top 10 mapping, recommendations and explanation for the report
+    `sections` (ssl, headers, vulnerabilities, nmap, overall), from the
+    rule table alone: no I/O, no LLM. Same keys as an AI analysis.
+    """
+    findings = []
+
+    for rule, matcher in _RULES:
+        for match in matcher(sections, rule["value"]):
+            findings.append({
+                "rule": rule["id"],
+                "finding": rule["finding"].format(**match),
+                "mapped_to": rule["owasp"],
+                "confidence": rule["confidence"],
+                "severity": rule["severity"] or match.get("severity", "LOW"),
+                "recommendation": rule["recommendation"].format(**match),
+            })
+
+    # Most severe first; table order breaks ties
+    findings.sort(key=lambda f: -SEVERITY_ORDER.get(f["severity"], 0))
+
+    return {
+        "owasp": {
+            "status": "ok",
+            "source": "rules",
+            "categories_affected": _categories(findings),
+            "mapping_details": [
+                {key: f[key] for key in ("finding", "mapped_to", "confidence", "severity", "rule")}
+                for f in findings
+            ],
+        },
+        "recommendations": _recommendations(findings),
+        "explanation": _explanation(findings, sections.get("overall") or {}),
+    }
+
+
+# -------------------------
+# Matchers: (sections, rule value) -> template fields per match
+# -------------------------
+
+def _ssl_issue(sections: dict, value) -> Iterator[dict]:
+    ssl = sections.get("ssl") or {}
+    if ssl.get("issue") == value:
+        yield {"expiry_date": ssl.get("expiry_date") or "an unknown date"}
+
+
+def _tls_version(sections: dict, value) -> Iterator[dict]:
+    version = (sections.get("ssl") or {}).get("tls_version")
+    if version in value:
+        yield {"tls_version": version}
+
+
+def _missing_header(sections: dict, value) -> Iterator[dict]:
+    missing = (sections.get("headers") or {}).get("missing_headers") or []
+    for header in _as_list(value):
+        if header in missing:
+            meta = SECURITY_HEADERS.get(header, {})
+            yield {
+                "header": header,
+                "header_recommendation": meta.get("recommendation", f"Add the {header} header."),
+                "severity": meta.get("severity", "Low").upper(),
+            }
+
+
+def _header_lacks(sections: dict, value) -> Iterator[dict]:
+    header, directive = value
+    present = (sections.get("headers") or {}).get("present_headers") or {}
+    if header in present and directive not in str(present[header]).lower():
+        yield {"header": header}
+
+
+def _open_port(sections: dict, value) -> Iterator[dict]:
+    for port in _open_ports(sections):
+        if port.get("port") in value:
+            yield _port_fields(port)
+
+
+def _port_risk(sections: dict, value) -> Iterator[dict]:
+    for port in _open_ports(sections):
+        if port.get("risk") == value:
+            yield _port_fields(port)
+
+
+def _component_cves(sections: dict, value) -> Iterator[dict]:
+    for entry in sections.get("vulnerabilities") or []:
+        vulns = entry.get("vulnerabilities")
+        if not vulns:
+            continue
+
+        worst = max((v.get("severity") or "UNKNOWN" for v in vulns), key=lambda s: SEVERITY_ORDER.get(s, 0))
+        ids = [v["id"] for v in vulns if v.get("id")]
+        cves = ", ".join(ids[:3]) + (f" and {len(ids) - 3} more" if len(ids) > 3 else "")
+
+        yield {
+            "technology": entry.get("technology"),
+            "component": " ".join(part for part in (entry.get("technology"), entry.get("version")) if part),
+            "count": len(vulns),
+            "worst": worst,
+            # Unrated advisories (record lookup failed): a known vulnerability is at least MEDIUM
+            "severity": worst if SEVERITY_ORDER.get(worst, 0) >= SEVERITY_ORDER["LOW"] else "MEDIUM",
+            "cves": cves or "the published advisories",
+        }
+
+
+def _component_lookup_error(sections: dict, value) -> Iterator[dict]:
+    for entry in sections.get("vulnerabilities") or []:
+        if "error" in entry:
+            yield {"technology": entry.get("technology")}
+
+
+MATCHERS = {
+    "ssl_issue": _ssl_issue,
+    "tls_version": _tls_version,
+    "missing_header": _missing_header,
+    "header_lacks": _header_lacks,
+    "open_port": _open_port,
+    "port_risk": _port_risk,
+    "component_cves": _component_cves,
+    "component_lookup_error": _component_lookup_error,
+}
+
+
+# -------------------------
+# Helper functions
+# -------------------------
+
+def _compile(rules: List[dict]) -> list:
+    # A typo in the table fails at import, not in the middle of a scan
+    compiled = []
+    for rule in rules:
+        if rule["check"] not in MATCHERS:
+            raise ValueError(f"Rule '{rule['id']}' uses unknown check '{rule['check']}'")
+        compiled.append((rule, MATCHERS[rule["check"]]))
+    return compiled
+
+
+def _as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def _open_ports(sections: dict) -> list:
+    return (sections.get("nmap") or {}).get("open_ports") or []
+
+
+def _port_fields(port: dict) -> dict:
+    return {"port": port.get("port"), "service": port.get("service") or "unknown service"}
+
+
+def _categories(findings: List[dict]) -> List[dict]:
+    categories = {}
+
+    for f in findings:
+        owasp_id = f["mapped_to"]
+        category = categories.setdefault(owasp_id, {
+            "owasp_id": owasp_id,
+            "name": OWASP_REMEDIATION.get(owasp_id, {}).get("name"),
+            "confidence": f["confidence"],
+            "severity": f["severity"],
+            "findings": 0,
+            "remediation": OWASP_REMEDIATION.get(owasp_id, {}).get("remediation", []),
+        })
+        category["findings"] += 1
+        if CONFIDENCE_ORDER[f["confidence"]] > CONFIDENCE_ORDER[category["confidence"]]:
+            category["confidence"] = f["confidence"]
+
+    # Findings are sorted, so each category's first finding set its severity
+    return list(categories.values())
+
+
+def _recommendations(findings: List[dict]) -> List[dict]:
+    recommendations, seen = [], set()
+
+    for f in findings:
+        if f["recommendation"] in seen:
+            continue
+        seen.add(f["recommendation"])
+        recommendations.append({
+            "issue": f["finding"],
+            "severity": f["severity"],
+            "owasp": f["mapped_to"],
+            "recommendation": f["recommendation"],
+            "source": "rules",
+        })
+    return recommendations
+
+
+def _explanation(findings: List[dict], overall: dict) -> str:
+    if not findings:
+        return "The automated checks found no issues that map to the OWASP Top 10 (2021)."
+
+    top = findings[0]
+    categories = {f["mapped_to"] for f in findings}
+    name = OWASP_REMEDIATION.get(top["mapped_to"], {}).get("name", top["mapped_to"])
+    explanation = (
+        f"The scan found {len(findings)} issue{'s' if len(findings) != 1 else ''} across "
+        f"{len(categories)} OWASP Top 10 categor{'ies' if len(categories) != 1 else 'y'}. "
+        f"Most severe: {top['finding']} ({top['severity']}, {top['mapped_to']} {name}). "
+        f"Start with: {top['recommendation']}"
+    )
+
+    if overall.get("risk_score") is not None:
+        explanation += f" Overall risk score: {overall['risk_score']}/100 ({overall.get('severity')})."
+    return explanation
+
+
+_RULES = _compile(OWASP_RULES)
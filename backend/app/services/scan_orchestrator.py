@@ -0,0 +1,123 @@
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ScanStage:
+    """
+    A single unit of work inside a scan.
+    `func` receives the results of its dependencies as keyword arguments.
+    """
+
+    def __init__(self, name: str, func: Callable, depends_on: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+class ScanOrchestrator:
+    """
+    Runs scan stages as a dependency graph.
+    Every stage starts as soon as its dependencies are done, so independent
+    stages overlap and wall-clock time follows the slowest branch.
+    Blocking stages are moved to worker threads.
+
+    `on_stage(name, state, result)` is called on the event loop as each
+    stage goes "running" -> "done" (with its result) or "failed"
+    (with the exception).
+    """
+
+    def __init__(self, on_stage: Optional[Callable[[str, str, Any], None]] = None):
+        self.stages: Dict[str, ScanStage] = {}
+        self.timings: Dict[str, float] = {}
+        self.on_stage = on_stage
+
+    def add_stage(self, name: str, func: Callable, depends_on: Iterable[str] = ()):
+        """
+        Register a stage. Dependencies must already be registered,
+        which keeps the graph acyclic by construction.
+        """
+        depends_on = tuple(depends_on)
+
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already registered")
+
+        for dep in depends_on:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+
+        self.stages[name] = ScanStage(name, func, depends_on)
+
+    def restrict_to(self, names: Iterable[str]):
+        """
+        Keep only `names` and the stages they (transitively) depend on
+        """
+        wanted = set()
+        todo = list(names)
+
+        while todo:
+            name = todo.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'")
+            if name not in wanted:
+                wanted.add(name)
+                todo.extend(self.stages[name].depends_on)
+
+        self.stages = {name: stage for name, stage in self.stages.items() if name in wanted}
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Execute all stages and return {stage_name: result}
+        """
+        results: Dict[str, Any] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: ScanStage):
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+
+            kwargs = {dep: results[dep] for dep in stage.depends_on}
+            started = time.perf_counter()
+            self._notify(stage.name, "running")
+
+            try:
+                if inspect.iscoroutinefunction(stage.func):
+                    value = await stage.func(**kwargs)
+                else:
+                    value = await asyncio.to_thread(stage.func, **kwargs)
+            except Exception as e:
+                self._notify(stage.name, "failed", e)
+                raise
+
+            self.timings[stage.name] = round((time.perf_counter() - started) * 1000, 1)
+            results[stage.name] = value
+            self._notify(stage.name, "done", value)
+
+            logger.debug(f"Stage '{stage.name}' finished in {self.timings[stage.name]} ms")
+            return value
+
+        # Registration order is a valid topological order
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(run_stage(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return results
+
+    def _notify(self, name: str, state: str, result: Any = None):
+        if self.on_stage is None:
+            return
+        try:
+            self.on_stage(name, state, result)
+        except Exception as e:
+            # Progress reporting must never break the scan
+            logger.warning(f"Stage callback failed for '{name}': {e}")
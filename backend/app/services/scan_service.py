@@ -1,104 +1,346 @@
 
+import asyncio
+import re
+from functools import partial
 from datetime import datetime, timezone
-import requests
+from urllib.parse import urlparse
 
-from app.services.ssl_service import check_ssl
+from app.services.fetch_service import FetchContext, fetch_page
+from app.services.ssl_service import check_ssl, certificate_fingerprint
 from app.services.header_service import check_security_headers
 from app.services.hybrid_detector import HybridTechnologyDetector
 from app.services.severity_service import calculate_overall_severity
+from app.services.rule_engine import evaluate_rules
 from app.services.vulnerability_service import VulnerabilityService
 from app.services.ai_analysis_service import AIAnalysisService
 from app.services.nmap_service import run_nmap_scan
-from app.config import NMAP_ENABLED
+from app.services.scan_orchestrator import ScanOrchestrator
+from app.services.incremental_scan import StageReuse, resolve_addresses
+from app.services.deferred_ai_service import get_deferred_ai
+from app.config import NMAP_ENABLED, VULN_LOOKUP_CONCURRENCY, VULN_STAGE_DEADLINE, AI_ENRICHMENT_ENABLED
+from app.data.library_packages import LIBRARY_PACKAGES, PACKAGE_VERSION_FROM_REVISION
+from app.utils.concurrency import map_bounded
+
+SKIP_VULN_CATEGORIES = {"CDN", "WAF", "DNS", "SaaS"}
+
+# Stages registered by run_all_scans_async, in registration order
+SCAN_STAGES = ("fetch", "ssl", "nmap", "headers", "technology", "vulnerabilities", "overall", "rules", "ai")
+# What the AI stage reads
+AI_INPUT_STAGES = ("ssl", "headers", "technology", "vulnerabilities", "nmap", "overall", "rules")
 
 
 def run_all_scans(url: str) -> dict:
     """
     Runs all security checks and returns a unified scan report
     """
+    return asyncio.run(run_all_scans_async(url))
+
+
+async def run_all_scans_async(
+    url: str,
+    on_stage=None,
+    stages=None,
+    previous=None,
+    defer_ai: bool = False,
+    on_ai_done=None,
+    use_llm: bool = True
+) -> dict:
+    """
+    Async entry point: stages run as a dependency graph
+
+        fetch ─┬─> technology ──> vulnerabilities ─┐
+               └─> headers ────────────────────────┤
+        ssl ───────────────────────────────────────┼──> overall ──> rules ──> ai
+        nmap ──────────────────────────────────────┘
+
+    The target page is fetched ONCE; headers and detection share it.
+    `on_stage` receives progress events (see ScanOrchestrator).
+    `stages` limits the scan to those stages plus their dependencies;
+    skipped sections are None in the report.
+
+    With a `previous` report of the same URL, every stage first
+    fingerprints its inputs (certificate, resolved IP, header and body
+    hashes, detected versions, AI input) and reuses the previous section
+    when they match. The report lists those under `reused_stages`.
+
+    `defer_ai` returns as soon as `overall` is known, with ai_status
+    "pending" and a scan_id; the analysis is attached in the background
+    (see deferred_ai_service) and the final report passed to `on_ai_done`.
+
+    OWASP mapping, recommendations and explanation come from the rule
+    table (`rules` stage); the LLM only enriches them. Without `use_llm`
+    (or AI_ENRICHMENT_ENABLED) the `ai` stage is skipped: ai_status "rules".
+    """
+    orchestrator = ScanOrchestrator(on_stage=on_stage)
+    reuse = StageReuse(previous)
+
+    # 1️⃣ Independent network checks start together
+    orchestrator.add_stage("fetch", partial(fetch_page, url))
+    orchestrator.add_stage("ssl", partial(_check_ssl, url, reuse))
+    orchestrator.add_stage("nmap", partial(_run_nmap, url, reuse))
+
+    # 2️⃣ Everything that reads the page shares the same fetch
+    orchestrator.add_stage(
+        "headers",
+        partial(_check_headers, url, reuse),
+        depends_on=["fetch"]
+    )
+    orchestrator.add_stage(
+        "technology",
+        partial(_detect_technology, reuse),
+        depends_on=["fetch"]
+    )
+    orchestrator.add_stage(
+        "vulnerabilities",
+        partial(_check_vulnerabilities, reuse),
+        depends_on=["technology"]
+    )
 
-    # 1️⃣ Fetch website content
-    response = requests.get(url, timeout=15)
-    html = response.text
-    headers = dict(response.headers)
+    # 3️⃣ Rule-based severity and OWASP mapping, then ONE AI call to enrich them
+    orchestrator.add_stage(
+        "overall",
+        _calculate_overall,
+        depends_on=["ssl", "headers", "technology", "vulnerabilities", "nmap"]
+    )
+    orchestrator.add_stage(
+        "rules",
+        _evaluate_rules,
+        depends_on=["ssl", "headers", "vulnerabilities", "nmap", "overall"]
+    )
+    orchestrator.add_stage(
+        "ai",
+        partial(_run_ai_analysis, url, reuse),
+        depends_on=["ssl", "headers", "technology", "vulnerabilities", "nmap", "overall", "rules"]
+    )
 
-    # 2️⃣ Run deterministic security checks (NO AI)
-    ssl_result = check_ssl(url)
-    headers_result = check_security_headers(url)
-    
-    nmap_result = None
-    if NMAP_ENABLED:
-      nmap_result = run_nmap_scan(url.replace("http://", "").replace("https://", ""))
+    use_llm = use_llm and AI_ENRICHMENT_ENABLED
+
+    if stages:
+        orchestrator.restrict_to(stages)
+    if defer_ai or not use_llm:
+        orchestrator.restrict_to([name for name in orchestrator.stages if name != "ai"])
+
+    results = await orchestrator.run()
+    fetch = results.get("fetch")
+
+    report = {
+        "url": url,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "fetch": fetch.summary() if fetch else None,
+        "ssl": results.get("ssl"),
+        "headers": results.get("headers"),
+        "technology": results.get("technology"),
+        "vulnerabilities": results.get("vulnerabilities"),
+        "nmap": results.get("nmap"),
+        "overall": dict(results["overall"]) if "overall" in results else None,
+        "stage_timings_ms": orchestrator.timings,
+        "reused_stages": reuse.reused,
+        "fingerprints": dict(reuse.fingerprints),
+    }
+
+    # 4️⃣ Merge rule-based and AI results into final response
+    rules = results.get("rules")
+
+    if "ai" in results:
+        return _attach_ai(report, results["ai"], rules)
+
+    if rules is not None and not use_llm:
+        return {**_attach_ai(report, {}, rules), "ai_status": "rules"}
+
+    if not (defer_ai and rules is not None):
+        return {**_attach_ai(report, {}, rules), "ai_status": "skipped"}
+
+    ai_input = _build_ai_input(url, **{name: results[name] for name in AI_INPUT_STAGES})
+    if reuse.unchanged("ai", ai_input):
+        report["reused_stages"] = reuse.reused
+        report["fingerprints"] = dict(reuse.fingerprints)
+        return _attach_ai(report, _previous_ai(reuse.previous), rules)
+
+    report = _attach_ai(report, {}, rules)
+
+    def finish() -> dict:
+        ai_result = _call_ai(reuse, ai_input)
+        return _attach_ai({**report, "fingerprints": dict(reuse.fingerprints)}, ai_result, rules)
+
+    get_deferred_ai().submit(url, report, finish, on_done=on_ai_done)
+    return report
+
+
+# -------------------------
+# Stage helpers
+# -------------------------
+
+def _check_ssl(url: str, reuse: StageReuse) -> dict:
+    # One handshake decides whether the full check is needed
+    if reuse.has("ssl") and reuse.unchanged("ssl", certificate_fingerprint(url)):
+        return reuse.previous["ssl"]
+
+    result = check_ssl(url)
+    reuse.record("ssl", result.get("fingerprint_sha256"))
+    return result
+
+
+def _check_headers(url: str, reuse: StageReuse, fetch: FetchContext) -> dict:
+    if reuse.unchanged("headers", fetch.headers_hash()):
+        return reuse.previous["headers"]
+    return check_security_headers(url, context=fetch)
+
+
+def _run_nmap(url: str, reuse: StageReuse):
+    if not NMAP_ENABLED:
+        return None
+
+    if reuse.unchanged("nmap", resolve_addresses(urlparse(url).hostname or "")):
+        return reuse.previous["nmap"]
+    return run_nmap_scan(url.replace("http://", "").replace("https://", ""))
+
+
+def _detect_technology(reuse: StageReuse, fetch: FetchContext) -> dict:
+    if reuse.unchanged("technology", fetch.headers_hash(), fetch.body_hash()):
+        return reuse.previous["technology"]
 
     tech_detector = HybridTechnologyDetector()
-    technology_result = tech_detector.detect(
-        url=url, html=html, headers=headers
+    return tech_detector.detect_from_context(fetch)
+
+
+def _check_vulnerabilities(reuse: StageReuse, technology: dict) -> list:
+    # Same products and versions -> same lookups
+    detected = sorted(
+        (name, tech_data.get("version"), sorted(tech_data.get("categories", [])))
+        for name, tech_data in technology.get("technologies", {}).items()
     )
+    if reuse.unchanged("vulnerabilities", detected):
+        return reuse.previous["vulnerabilities"]
 
-    # 3️⃣ Vulnerability scanning (NVD / OSV only, NO AI)
-    vuln_service = VulnerabilityService()
+    return _lookup_vulnerabilities(technology)
 
-    SKIP_VULN_CATEGORIES = {"CDN", "WAF", "DNS", "SaaS"}
+
+def _lookup_vulnerabilities(technology: dict) -> list:
+    """
+    Vulnerability scanning (NVD / OSV only, NO AI).
+    NVD lookups run concurrently (VULN_LOOKUP_CONCURRENCY) alongside ONE
+    OSV batch request for versioned JS libraries, all within
+    VULN_STAGE_DEADLINE. Entries keep detection order.
+    """
+    vuln_service = VulnerabilityService()
     vulnerabilities = []
+    nvd_lookups = []
+    libraries = []
 
-    for name, tech_data in technology_result.get("technologies", {}).items():
+    for name, tech_data in technology.get("technologies", {}).items():
         categories = set(tech_data.get("categories", []))
 
         if categories & SKIP_VULN_CATEGORIES:
             continue
 
         version = tech_data.get("version")
+        package = LIBRARY_PACKAGES.get(name)
+
+        # Filled in once the lookups finish
+        if package and version:
+            libraries.append((len(vulnerabilities), (*package, _package_version(name, version))))
+        else:
+            nvd_lookups.append(len(vulnerabilities))
+        vulnerabilities.append({"technology": name, "version": version})
+
+    jobs = [
+        partial(
+            vuln_service.check_web_technology,
+            name=vulnerabilities[i]["technology"],
+            version=vulnerabilities[i]["version"]
+        )
+        for i in nvd_lookups
+    ]
+    if libraries:
+        jobs.append(partial(vuln_service.check_libraries, [package for _, package in libraries]))
+
+    outcomes = map_bounded(
+        lambda job: job(),
+        jobs,
+        max_workers=VULN_LOOKUP_CONCURRENCY,
+        deadline=VULN_STAGE_DEADLINE
+    )
+
+    for i, (vulns, error) in zip(nvd_lookups, outcomes):
+        if error is not None:
+            vulnerabilities[i]["error"] = str(error)
+        else:
+            vulnerabilities[i]["vulnerabilities"] = vulns or []
+
+    if libraries:
+        results, error = outcomes[-1]
+        if error is not None:
+            results = [{"error": str(error)}] * len(libraries)
+
+        for (position, _), result in zip(libraries, results):
+            if "error" in result:
+                vulnerabilities[position]["error"] = result["error"]
+            else:
+                vulnerabilities[position]["vulnerabilities"] = result["vulnerabilities"] or []
 
-        try:
-            vulns = vuln_service.check_web_technology(
-                name=name,
-                version=version
-            )
-
-            vulnerabilities.append(
-                {
-                    "technology": name,
-                    "version": version,
-                    "vulnerabilities": vulns or [],
-                }
-            )
-
-        except Exception as e:
-            vulnerabilities.append(
-                {
-                    "technology": name,
-                    "version": version,
-                    "error": str(e),
-                }
-            )
-
-    # 4️⃣ Calculate base severity (rule-based)
-    overall = calculate_overall_severity(
+    return vulnerabilities
+
+
+def _package_version(name: str, version: str) -> str:
+    # Three.js r125 is 0.125.0 on npm; OSV knows no version "125"
+    template = PACKAGE_VERSION_FROM_REVISION.get(name)
+    match = re.fullmatch(r"r?(\d+)", version.strip()) if template else None
+    return template.format(match.group(1)) if match else version
+
+
+def _calculate_overall(ssl, headers, technology, vulnerabilities, nmap) -> dict:
+    """
+    Calculate base severity (rule-based)
+    """
+    return calculate_overall_severity(
         [
-            ssl_result,
-            headers_result,
-            technology_result,
+            ssl,
+            headers,
+            technology,
             {"vulnerabilities": vulnerabilities},
-            nmap_result
+            nmap
         ]
     )
 
-    # 5️⃣ Prepare SMALL AI input (🚨 FIXED)
+
+def _evaluate_rules(ssl, headers, vulnerabilities, nmap, overall) -> dict:
+    """
+    OWASP mapping, recommendations and explanation from the rule table (no LLM)
+    """
+    return evaluate_rules({
+        "ssl": ssl,
+        "headers": headers,
+        "vulnerabilities": vulnerabilities,
+        "nmap": nmap,
+        "overall": overall,
+    })
+
+
+def _run_ai_analysis(url, reuse, ssl, headers, technology, vulnerabilities, nmap, overall, rules) -> dict:
+    ai_input = _build_ai_input(url, ssl, headers, technology, vulnerabilities, nmap, overall, rules)
+
+    if reuse.unchanged("ai", ai_input):
+        return _previous_ai(reuse.previous)
+    return _call_ai(reuse, ai_input)
+
+
+def _build_ai_input(url, ssl, headers, technology, vulnerabilities, nmap, overall, rules) -> dict:
+    # Prepare SMALL AI input (🚨 FIXED)
     ai_input = {
         "url": url,
 
         "ssl": {
-            "enabled": ssl_result.get("enabled"),
-            "severity": ssl_result.get("severity"),
-            "issue": ssl_result.get("issue"),
+            "enabled": ssl.get("enabled"),
+            "severity": ssl.get("severity"),
+            "issue": ssl.get("issue"),
         },
 
         "headers": {
-            "missing_count": len(headers_result.get("missing_headers", [])),
-            "missing_sample": headers_result.get("missing_headers", [])[:3],
-            "severity": headers_result.get("severity"),
+            "missing_count": len(headers.get("missing_headers", [])),
+            "missing_sample": headers.get("missing_headers", [])[:3],
+            "severity": headers.get("severity"),
         },
-        "nmap": nmap_result,
+        "nmap": nmap,
         "vulnerabilities_summary": {
             "technologies_checked": len(vulnerabilities),
             "technologies_with_cves": [
@@ -109,35 +351,81 @@ def run_all_scans(url: str) -> dict:
         },
 
         "technology_summary": {
-            "total_detected": technology_result.get("total_count"),
+            "total_detected": technology.get("total_count"),
         },
 
         "overall_risk_score": overall.get("risk_score"),
+
+        # What the LLM enriches: "A05:2021 Missing X-Frame-Options header", most severe first
+        "owasp_findings": [
+            f"{f['mapped_to']} {f['finding']}"
+            for f in rules["owasp"]["mapping_details"]
+            if f["confidence"] != "Informational"
+        ][:10],
     }
+    return ai_input
+
 
-    # 6️⃣ ONE AI call
+def _call_ai(reuse: StageReuse, ai_input: dict) -> dict:
+    # ONE AI call
     ai_service = AIAnalysisService()
-    ai_result = ai_service.analyze(ai_input)
+    result = ai_service.analyze(ai_input)
+
+    # A failed analysis is retried on the next scan
+    if ai_service.is_fallback(result):
+        reuse.record("ai", None)
+    return result
 
-    # 7️⃣ Merge AI result into final response
+
+def _previous_ai(previous: dict) -> dict:
     return {
-        "url": url,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "ssl": ssl_result,
-        "headers": headers_result,
-        "technology": technology_result,
-        "vulnerabilities": vulnerabilities,
-        "nmap": nmap_result,
-        "overall": {
-            **overall,
-            "ai": ai_result.get("risk"),
-        },
-        "owasp": ai_result.get("owasp"),
-        "ai_recommendations": ai_result.get("recommendations"),
-        "ai_explanation": ai_result.get("explanation"),
+        "owasp": previous.get("owasp"),
+        "risk": (previous.get("overall") or {}).get("ai"),
+        # The rule-based part is recomputed every scan
+        "recommendations": [
+            r for r in previous.get("ai_recommendations") or []
+            if isinstance(r, dict) and r.get("source") == "ai"
+        ],
+        "explanation": previous.get("ai_explanation"),
+        "prompt": previous.get("ai_prompt"),
+    }
+
+
+def _attach_ai(report: dict, ai_result: dict, rules: dict = None) -> dict:
+    """
+    Copy of `report` with the analysis fields: the rule-based OWASP mapping,
+    recommendations and explanation, enriched by the LLM's `ai_result`
+    """
+    rules = rules or {}
+    enriched = bool(ai_result) and not AIAnalysisService.is_fallback(ai_result)
+
+    overall = report.get("overall")
+    if overall is not None:
+        overall = {**overall, "ai": ai_result.get("risk")}
+
+    recommendations = list(rules.get("recommendations") or [])
+    if enriched:
+        recommendations += [_ai_recommendation(r) for r in ai_result.get("recommendations") or []]
+
+    return {
+        **report,
+        "overall": overall,
+        "owasp": rules.get("owasp") or ai_result.get("owasp"),
+        "ai_recommendations": recommendations,
+        "ai_explanation": (ai_result.get("explanation") if enriched else None) or rules.get("explanation"),
+        # Estimated prompt tokens and any trimmed fields
+        "ai_prompt": ai_result.get("prompt"),
+        "ai_status": "unavailable" if AIAnalysisService.is_fallback(ai_result) else "completed",
     }
 
 
+def _ai_recommendation(recommendation) -> dict:
+    # The model answers with strings or objects
+    if isinstance(recommendation, dict):
+        return {**recommendation, "source": "ai"}
+    return {"recommendation": recommendation, "source": "ai"}
+
+
 # from datetime import datetime, timezone
 # import requests
 
@@ -174,6 +462,7 @@ def run_all_scans(url: str) -> dict:
 #     ai_explainer = AIExplanationService()
 
 #     SKIP_VULN_CATEGORIES = {"CDN", "WAF", "DNS", "SaaS"}
+
 #     vulnerabilities = []
 
 #     for name, tech_data in technology_result.get("technologies", {}).items():
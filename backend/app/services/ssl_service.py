@@ -1,3 +1,4 @@
+import hashlib
 import ssl
 import socket
 from datetime import datetime, timezone
@@ -17,6 +18,7 @@ def check_ssl(url: str) -> dict:
         "expiry_date": None,
         "issuer": None,
         "tls_version": None,
+        "fingerprint_sha256": None,
         "severity": "Low",
         "issue": None
     }
@@ -44,6 +46,7 @@ def check_ssl(url: str) -> dict:
         with socket.create_connection((hostname, 443), timeout=10) as sock:
             with context.wrap_socket(sock, server_hostname=hostname) as ssock:
                 cert = ssock.getpeercert()
+                result["fingerprint_sha256"] = hashlib.sha256(ssock.getpeercert(binary_form=True)).hexdigest()
 
                 result["valid"] = True
                 result["tls_version"] = ssock.version()
@@ -80,3 +83,27 @@ def check_ssl(url: str) -> dict:
         result["error_details"] = str(e)
 
     return result
+
+
+def certificate_fingerprint(url: str):
+    """
+    SHA-256 of the certificate the server presents now (one handshake,
+    no verification), or None when there is none to read
+    """
+    parsed = urlparse(url)
+    if parsed.scheme != "https" or not parsed.hostname:
+        return None
+
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+
+    try:
+        with socket.create_connection((parsed.hostname, 443), timeout=10) as sock:
+            with context.wrap_socket(sock, server_hostname=parsed.hostname) as ssock:
+                der = ssock.getpeercert(binary_form=True)
+    except (OSError, ssl.SSLError) as e:
+        logger.info(f"Certificate probe failed for {url}: {e}")
+        return None
+
+    return hashlib.sha256(der).hexdigest() if der else None
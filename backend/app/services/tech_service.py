@@ -3,12 +3,14 @@ import logging
 from app.utils.url_validator import validate_url
 from app.services.hybrid_detector import HybridTechnologyDetector
 from app.services.nvd_fallback_service import nvd_fallback_by_product
-from app.config import REQUEST_TIMEOUT, USER_AGENT
+from app.services.fetch_service import FetchContext, fetch_page
+from app.utils.concurrency import map_bounded
+from app.config import VULN_LOOKUP_CONCURRENCY, VULN_STAGE_DEADLINE
 
 logger = logging.getLogger(__name__)
 
 
-def detect_technology(url: str) -> dict:
+def detect_technology(url: str, context: FetchContext | None = None) -> dict:
     result = {
         "service": "technology",
         "technologies": {},
@@ -32,25 +34,17 @@ def detect_technology(url: str) -> dict:
         return result
 
     try:
-        # Fetch website
-        response = requests.get(
-            normalized_url,
-            timeout=REQUEST_TIMEOUT,
-            allow_redirects=True,
-            headers={"User-Agent": USER_AGENT},
-            verify=True
-        )
-        response.raise_for_status()
-
-        html = response.text
-        headers = dict(response.headers)
+        # Fetch website (or reuse the scan's shared fetch)
+        if context is None:
+            context = fetch_page(normalized_url)
+        context.raise_for_status()
 
-        result["server"] = headers.get("Server")
-        result["powered_by"] = headers.get("X-Powered-By")
+        result["server"] = context.headers.get("Server")
+        result["powered_by"] = context.headers.get("X-Powered-By")
 
         # Detect technologies
         detector = HybridTechnologyDetector()
-        detection_result = detector.detect(normalized_url, html, headers)
+        detection_result = detector.detect_from_context(context)
 
         if not detection_result["success"]:
             result["issue"] = detection_result.get("error", "Technology detection failed")
@@ -64,8 +58,21 @@ def detect_technology(url: str) -> dict:
         result["cloudflare_detected"] = detection_result["cloudflare_detected"]
 
         # ---------------- NVD FALLBACK (SANITIZED) ----------------
-        for tech_name, tech in result["technologies"].items():
-            nvd_info = nvd_fallback_by_product(tech_name)
+        # Lookups run concurrently; anything past the deadline is reported as unavailable
+        technologies = list(result["technologies"].items())
+        outcomes = map_bounded(
+            lambda item: nvd_fallback_by_product(item[0], version=item[1].get("version")),
+            technologies,
+            max_workers=VULN_LOOKUP_CONCURRENCY,
+            deadline=VULN_STAGE_DEADLINE
+        )
+
+        for (tech_name, tech), (nvd_info, error) in zip(technologies, outcomes):
+            if error is not None:
+                nvd_info = {
+                    "status": "informational",
+                    "message": "Vulnerability data unavailable."
+                }
 
             # Potential risk
             if nvd_info.get("status") == "potential":
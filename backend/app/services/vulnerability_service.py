@@ -2,7 +2,17 @@
 
 from app.vuln_sources.nvd_client import NVDClient
 from app.vuln_sources.osv_client import OSVClient
-from app.config import NVD_API_KEY, CVSS_LEVELS
+from app.config import (
+    NVD_API_KEY,
+    CVSS_LEVELS,
+    VULN_CACHE_TTL,
+    VULN_CACHE_STALE_TTL,
+    VULN_CACHE_NEGATIVE_TTL,
+    VULN_LOOKUP_CONCURRENCY,
+)
+from app.utils.concurrency import map_bounded
+from app.utils.sqlite_cache import get_cache
+from app.vuln_sources.nvd_scheduler import NVDBusy
 
 
 class VulnerabilityService:
@@ -13,12 +23,29 @@ class VulnerabilityService:
     def __init__(self):
         self.nvd = NVDClient(api_key=NVD_API_KEY)
         self.osv = OSVClient()
+        self.cache = get_cache("nvd_cves")
+        self.osv_cache = get_cache("osv_packages")
+        self.osv_vuln_cache = get_cache("osv_vulns")
 
     def check_web_technology(self, name: str, version: str | None = None):
         """
         For Apache, Nginx, WordPress, PHP, etc.
+        Served from the persistent cache when the product was seen recently.
         """
-        cves = self.nvd.search(name, version)
+        if self.nvd.mode == "mirror":
+            # Already a local index lookup
+            return self._attach_severity(self.nvd.search(name, version))
+
+        key = f"{name.strip().lower()}|{(version or '').strip().lower()}"
+
+        cves = self.cache.get_or_load(
+            key,
+            lambda: self.nvd.search(name, version),
+            ttl=VULN_CACHE_TTL,
+            negative_ttl=VULN_CACHE_NEGATIVE_TTL,
+            stale_ttl=VULN_CACHE_STALE_TTL,
+            transient=(NVDBusy,)
+        )
         return self._attach_severity(cves)
 
     def check_library(self, ecosystem: str, package: str, version: str):
@@ -27,9 +54,70 @@ class VulnerabilityService:
         """
         return self.osv.query(ecosystem, package, version)
 
+    def check_libraries(self, packages: list) -> list:
+        """
+        Resolve many (ecosystem, package, version) tuples with ONE
+        OSV batch request (cached entries are not re-queried). The batch
+        answer has ids only; their severity comes from the per-id records.
+        Returns one {"vulnerabilities": [...]} or {"error": ...} per package.
+        """
+        keys = [f"{eco}|{name}|{version}" for eco, name, version in packages]
+        by_key = dict(zip(keys, packages))
+
+        def load(missing: list) -> dict:
+            found = self.osv.query_batch([by_key[key] for key in missing])
+            return dict(zip(missing, found))
+
+        values, errors = self.osv_cache.get_many_or_load(
+            keys,
+            load,
+            ttl=VULN_CACHE_TTL,
+            negative_ttl=VULN_CACHE_NEGATIVE_TTL,
+            stale_ttl=VULN_CACHE_STALE_TTL
+        )
+        self._hydrate_osv([vuln for key in keys if key in values for vuln in values[key]])
+
+        return [
+            {"error": errors[key]} if key in errors
+            else {"vulnerabilities": self._attach_severity(values.get(key, []))}
+            for key in keys
+        ]
+
+    def _hydrate_osv(self, vulns: list):
+        """
+        Fill summary, details, cvss and severity of batch entries in place
+        from the full OSV records, fetched once per id and cached.
+        """
+        ids = list(dict.fromkeys(v["id"] for v in vulns if v.get("cvss") is None and not v.get("severity")))
+        if not ids:
+            return
+
+        def load(missing: list) -> dict:
+            outcomes = map_bounded(self.osv.get_vuln, missing, max_workers=VULN_LOOKUP_CONCURRENCY)
+            # Failed ids are left out: not cached, reported as UNKNOWN this time
+            return {vuln_id: record for vuln_id, (record, error) in zip(missing, outcomes) if error is None}
+
+        records, _ = self.osv_vuln_cache.get_many_or_load(
+            ids,
+            load,
+            ttl=VULN_CACHE_TTL,
+            negative_ttl=VULN_CACHE_NEGATIVE_TTL,
+            stale_ttl=VULN_CACHE_STALE_TTL
+        )
+
+        for vuln in vulns:
+            record = records.get(vuln["id"])
+            if record:
+                for field in ("summary", "details", "cvss", "severity"):
+                    vuln[field] = record.get(field)
+
     def _attach_severity(self, cves: list) -> list:
         for cve in cves:
-            cve["severity"] = self._cvss_to_severity(cve.get("cvss"))
+            if cve.get("cvss") is not None:
+                cve["severity"] = self._cvss_to_severity(cve["cvss"])
+            else:
+                # OSV advisories may be rated without a CVSS vector
+                cve["severity"] = cve.get("severity") or "UNKNOWN"
         return cves
 
     def _cvss_to_severity(self, score):
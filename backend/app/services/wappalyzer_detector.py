@@ -1,6 +1,9 @@
 import logging
+import threading
+import time
 from typing import Dict
 from app.config import WAPPALYZER_ENABLED
+from app.services.html_signals import HTMLSignals
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +16,46 @@ try:
 except ImportError:
     logger.warning("Wappalyzer not installed. Regex fallback will be used.")
 
+# Process-wide fingerprint database (loaded once, read-only afterwards)
+_FINGERPRINTS = None
+_FINGERPRINTS_LOAD_MS = None
+_fingerprints_lock = threading.Lock()
+
+
+def load_fingerprints():
+    """
+    Load and compile the Wappalyzer fingerprint database once per process.
+    Called from the app lifespan hook; later calls return the cached copy.
+    """
+    global _FINGERPRINTS, _FINGERPRINTS_LOAD_MS
+
+    if _FINGERPRINTS is not None:
+        return _FINGERPRINTS
+
+    if not (WAPPALYZER_ENABLED and WAPPALYZER_AVAILABLE):
+        return None
+
+    with _fingerprints_lock:
+        if _FINGERPRINTS is None:
+            started = time.perf_counter()
+            _FINGERPRINTS = Wappalyzer.latest()
+            _FINGERPRINTS_LOAD_MS = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(
+                f"Wappalyzer fingerprints loaded: {len(_FINGERPRINTS.technologies)} "
+                f"technologies in {_FINGERPRINTS_LOAD_MS} ms"
+            )
+
+    return _FINGERPRINTS
+
+
+def get_fingerprint_status() -> Dict:
+    """Load state of the shared fingerprint database"""
+    return {
+        "loaded": _FINGERPRINTS is not None,
+        "load_time_ms": _FINGERPRINTS_LOAD_MS,
+        "technologies": len(_FINGERPRINTS.technologies) if _FINGERPRINTS is not None else 0
+    }
+
 
 class WappalyzerDetector:
     """
@@ -26,20 +69,17 @@ class WappalyzerDetector:
         
         if self.enabled:
             try:
-                self.wappalyzer = Wappalyzer.latest()
-                logger.info("Wappalyzer initialized successfully")
+                self.wappalyzer = load_fingerprints()
             except Exception as e:
                 logger.error(f"Failed to initialize Wappalyzer: {e}")
                 self.enabled = False
     
-    def detect(self, url: str, html: str, headers: dict) -> Dict:
+    def detect(self, signals: HTMLSignals) -> Dict:
         """
         Detect technologies using Wappalyzer
         
         Args:
-            url: Target URL
-            html: HTML content
-            headers: HTTP response headers
+            signals: Pre-extracted page signals (url, html, headers, scripts, meta)
             
         Returns:
             {
@@ -71,12 +111,15 @@ class WappalyzerDetector:
             result["error"] = "Wappalyzer not enabled or not available"
             return result
         
+        url = signals.url
+
         try:
-            # Create WebPage object
-            webpage = WebPage(url, html, headers)
+            # WebPage from the shared signals (no second HTML parse)
+            webpage = _webpage_from_signals(signals)
             
             # Analyze with versions and categories
-            detected = self.wappalyzer.analyze_with_versions_and_categories(webpage)
+            analyzer = _isolated_analyzer(self.wappalyzer)
+            detected = analyzer.analyze_with_versions_and_categories(webpage)
             
             # Format results
             for tech_name, details in detected.items():
@@ -109,4 +152,34 @@ class WappalyzerDetector:
 
 def is_wappalyzer_available() -> bool:
     """Module-level function to check Wappalyzer availability"""
-    return WAPPALYZER_AVAILABLE and WAPPALYZER_ENABLED
\ No newline at end of file
+    return WAPPALYZER_AVAILABLE and WAPPALYZER_ENABLED
+
+
+def _isolated_analyzer(shared) -> "Wappalyzer":
+    """
+    python-Wappalyzer records matches (confidence, versions) on the
+    technology dicts themselves. Each analysis gets shallow copies so
+    the shared, compiled database is never written to.
+    """
+    analyzer = Wappalyzer.__new__(Wappalyzer)
+    analyzer.categories = shared.categories
+    analyzer.confidence_regexp = shared.confidence_regexp
+    analyzer.technologies = {
+        name: dict(technology)
+        for name, technology in shared.technologies.items()
+    }
+    return analyzer
+
+
+def _webpage_from_signals(signals: HTMLSignals) -> "WebPage":
+    """
+    Build a Wappalyzer WebPage without letting it re-parse the HTML
+    """
+    webpage = WebPage.__new__(WebPage)
+    webpage.url = signals.url
+    webpage.html = signals.html
+    webpage.headers = signals.headers
+    webpage.scripts = signals.scripts
+    webpage.meta = signals.meta
+    webpage.parsed_html = None
+    return webpage
@@ -1,3 +1,8 @@
+import json
+from typing import Any, List, Tuple
+
+from app.config import AI_PROMPT_TOKEN_BUDGET
+
 SYSTEM_PROMPT = """
 You are a cybersecurity assistant.
 Explain security issues in a defensive and educational manner.
@@ -12,3 +17,187 @@ IMPORTANT:
 Return ONLY valid JSON.
 Do not add explanations outside JSON.
 """
+
+# -------------------------
+# Scan analysis prompt
+# -------------------------
+
+ANALYSIS_SYSTEM_PROMPT = "You are a cybersecurity expert."
+
+ANALYSIS_INSTRUCTIONS = (
+    "The website scan findings below are already mapped to OWASP Top 10 (2021) by rules "
+    "(owasp_findings). Assess the overall risk in context, add prioritised recommendations "
+    "specific to this site beyond the generic fixes, and a short plain-language explanation. "
+    "Open ports widen the attack surface; SSH, databases and admin services raise risk most. "
+    "Use ONLY the data given, never invent vulnerabilities. Reply with strict JSON only, no markdown."
+)
+
+RESULT_FORMAT = '{"risk":{},"recommendations":[],"explanation":"string"}'
+
+# Port risk order when ports have to be cut
+_RISK_RANK = {"HIGH": 0, "MEDIUM": 1, "LOW": 2}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (~4 characters per token for English and JSON)
+    """
+    return len(text) // 4 + 1
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def build_analysis_prompt(scan_summary: dict, budget: int = AI_PROMPT_TOKEN_BUDGET) -> Tuple[str, dict]:
+    """
+    User prompt for one scan, within `budget` tokens (system prompt included)
+    as far as trimming allows. Returns (prompt, {"tokens", "trimmed"}).
+    """
+    fixed = estimate_tokens(ANALYSIS_SYSTEM_PROMPT + _prompt(""))
+    findings, trimmed = compact_findings(scan_summary, budget - fixed)
+
+    prompt = _prompt(compact_json(findings))
+    return prompt, {
+        "tokens": estimate_tokens(ANALYSIS_SYSTEM_PROMPT + prompt),
+        "trimmed": trimmed,
+    }
+
+
+def build_batch_prompt(lines: List[str]) -> str:
+    """
+    One request for several scans; `lines` are compact JSON objects
+    {"id": ..., "scan": {...}}
+    """
+    scans = "\n".join(lines)
+    return (
+        f"{ANALYSIS_INSTRUCTIONS} Analyze every scan on its own; never mix findings between scans.\n"
+        f'Return ONE JSON object keyed by scan id: {{"<id>":{RESULT_FORMAT}}}\n'
+        f"Scans, one per line:\n{scans}"
+    )
+
+
+def compact_findings(scan_summary: dict, budget: int) -> Tuple[dict, List[str]]:
+    """
+    Findings without empty fields and with nmap ports as short strings,
+    then trimmed step by step (lowest priority first) until the compact
+    JSON fits `budget` tokens. Returns (findings, names of applied steps).
+    """
+    findings = _drop_empty(scan_summary)
+    if isinstance(scan_summary.get("nmap"), dict):
+        findings["nmap"] = _compact_nmap(scan_summary["nmap"])
+
+    trimmed = []
+    for name, step in TRIM_STEPS:
+        if estimate_tokens(compact_json(findings)) <= budget:
+            break
+        if step(findings):
+            trimmed.append(name)
+
+    return findings, trimmed
+
+
+# -------------------------
+# Trimming steps
+# -------------------------
+
+def _trim_os(findings: dict) -> bool:
+    nmap = findings.get("nmap") or {}
+    return nmap.pop("os", None) is not None
+
+
+def _trim_header_sample(findings: dict) -> bool:
+    headers = findings.get("headers") or {}
+    return headers.pop("missing_sample", None) is not None
+
+
+def _trim_low_risk_ports(findings: dict) -> bool:
+    return _keep_ports(findings, lambda ports: [p for p in ports if not p.endswith(" LOW")])
+
+
+def _trim_ports_to_10(findings: dict) -> bool:
+    return _keep_ports(findings, lambda ports: ports[:10])
+
+
+def _trim_cve_technologies(findings: dict) -> bool:
+    summary = findings.get("vulnerabilities_summary") or {}
+    names = summary.get("technologies_with_cves") or []
+    if len(names) <= 3:
+        return False
+    summary["technologies_with_cves"] = names[:3]
+    return True
+
+
+def _trim_ports_to_3(findings: dict) -> bool:
+    return _keep_ports(findings, lambda ports: ports[:3])
+
+
+def _trim_owasp_findings(findings: dict) -> bool:
+    # Most severe first, so the head is what matters
+    mapped = findings.get("owasp_findings") or []
+    if len(mapped) <= 5:
+        return False
+    findings["owasp_findings"] = mapped[:5]
+    return True
+
+
+# Applied in this order, only as far as needed
+TRIM_STEPS = (
+    ("nmap.os", _trim_os),
+    ("headers.missing_sample", _trim_header_sample),
+    ("nmap.low_risk_ports", _trim_low_risk_ports),
+    ("nmap.ports>10", _trim_ports_to_10),
+    ("vulnerabilities.technologies_with_cves>3", _trim_cve_technologies),
+    ("owasp_findings>5", _trim_owasp_findings),
+    ("nmap.ports>3", _trim_ports_to_3),
+)
+
+
+# -------------------------
+# Helper functions
+# -------------------------
+
+def _prompt(findings: str) -> str:
+    return f"{ANALYSIS_INSTRUCTIONS}\nReturn: {RESULT_FORMAT}\nFindings: {findings}"
+
+
+def _drop_empty(value):
+    if isinstance(value, dict):
+        cleaned = {k: _drop_empty(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_drop_empty(v) for v in value]
+    return value
+
+
+def _compact_nmap(nmap: dict) -> dict:
+    if "error" in nmap:
+        return {"error": nmap["error"]}
+
+    ports = sorted(
+        nmap.get("open_ports") or [],
+        key=lambda p: (_RISK_RANK.get(p.get("risk"), 3), p.get("port") or 0)
+    )
+    return _drop_empty({
+        "severity": nmap.get("severity"),
+        # "22/ssh OpenSSH 8.2p1 HIGH"
+        "open_ports": [
+            " ".join(str(part) for part in (
+                f"{p.get('port')}/{p.get('service')}", p.get("version"), p.get("risk")
+            ) if part)
+            for p in ports
+        ],
+        "os": nmap.get("detected_os"),
+    })
+
+
+def _keep_ports(findings: dict, keep) -> bool:
+    nmap = findings.get("nmap") or {}
+    ports = nmap.get("open_ports") or []
+    kept = keep(ports)
+    if len(kept) == len(ports):
+        return False
+
+    nmap["open_ports"] = kept
+    nmap["ports_omitted"] = nmap.get("ports_omitted", 0) + len(ports) - len(kept)
+    return True
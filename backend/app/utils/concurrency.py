@@ -0,0 +1,49 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+
+def map_bounded(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int,
+    deadline: Optional[float] = None
+) -> List[Tuple[Any, Optional[BaseException]]]:
+    """
+    Call func(item) for every item on at most `max_workers` threads.
+    Returns one (result, error) pair per item, in input order. Items not
+    finished `deadline` seconds after the start get a TimeoutError and are
+    left to finish in the background.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    outcomes: List[Tuple[Any, Optional[BaseException]]] = [
+        (None, TimeoutError(f"Not finished within {deadline}s")) for _ in items
+    ]
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))))
+    ends_at = None if deadline is None else time.monotonic() + deadline
+
+    try:
+        # Workers inherit the caller's context (e.g. NVD request priority)
+        pending = {
+            executor.submit(contextvars.copy_context().run, func, item): i
+            for i, item in enumerate(items)
+        }
+
+        while pending:
+            timeout = None if ends_at is None else ends_at - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                error = future.exception()
+                outcomes[i] = (None, error) if error else (future.result(), None)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return outcomes
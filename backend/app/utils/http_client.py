@@ -0,0 +1,156 @@
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+
+from app.config import (
+    HTTP_POOL_HOSTS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_POOL_BLOCK,
+    HTTP2_ENABLED,
+)
+
+logger = logging.getLogger(__name__)
+
+_sessions = {}
+_ai_http_client = None
+_lock = threading.Lock()
+
+
+def get_session(name: str = "default") -> requests.Session:
+    """
+    Returns the app-lifetime keep-alive session for one upstream
+    ("target", "nvd", "osv", ...). Connections are reused across
+    scans and threads, capped at HTTP_POOL_MAXSIZE per host.
+    """
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _create_session()
+            _sessions[name] = session
+            logger.info(f"HTTP pool '{name}' created")
+
+    return session
+
+
+def get_ai_http_client():
+    """
+    Shared httpx client for the AI provider SDK.
+    Uses HTTP/2 when enabled and `h2` is installed.
+    """
+    global _ai_http_client
+
+    if _ai_http_client is not None:
+        return _ai_http_client
+
+    import httpx
+
+    with _lock:
+        if _ai_http_client is None:
+            http2 = HTTP2_ENABLED and _h2_available()
+            _ai_http_client = httpx.Client(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=HTTP_POOL_MAXSIZE,
+                    max_keepalive_connections=HTTP_POOL_MAXSIZE,
+                ),
+            )
+            logger.info(f"AI HTTP client created (http2={http2})")
+
+    return _ai_http_client
+
+
+def get_pool_stats() -> dict:
+    """
+    Connection reuse per client and host.
+    `reused` = requests served without opening a new connection.
+    """
+    stats = {}
+
+    for name, session in list(_sessions.items()):
+        hosts = {}
+        adapter = session.get_adapter("https://")
+        pools = adapter.poolmanager.pools
+
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            requests_made = pool.num_requests
+            connections = pool.num_connections
+            hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "requests": requests_made,
+                "connections_opened": connections,
+                "reused": max(0, requests_made - connections),
+            }
+
+        stats[name] = hosts
+
+    return {
+        "pool_hosts": HTTP_POOL_HOSTS,
+        "pool_maxsize": HTTP_POOL_MAXSIZE,
+        "clients": stats,
+        "ai_http2": bool(_ai_http_client is not None and HTTP2_ENABLED and _h2_available()),
+    }
+
+
+def close_http_clients():
+    """
+    Close every pooled connection (app shutdown)
+    """
+    global _ai_http_client
+
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+        if _ai_http_client is not None:
+            _ai_http_client.close()
+            _ai_http_client = None
+
+
+# -------------------------
+# Helper functions
+# -------------------------
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_HOSTS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        pool_block=HTTP_POOL_BLOCK,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    # Shared across scans: never carry cookies from one fetch to the next
+    session.cookies = _FetchScopedCookieJar()
+
+    return session
+
+
+class _FetchScopedCookieJar(RequestsCookieJar):
+    """
+    Session jar that keeps nothing. requests copies it into a fresh jar
+    for every request, and that per-fetch jar still collects the cookies
+    set along its redirects; it is dropped when the fetch ends.
+    """
+
+    def set_cookie(self, cookie, *args, **kwargs):
+        pass
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
@@ -0,0 +1,336 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import CACHE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+_caches: Dict[str, "SQLiteCache"] = {}
+_registry_lock = threading.Lock()
+
+# Stale entries are refreshed here, never on the scan's critical path
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+FRESH = "fresh"
+STALE = "stale"
+NEGATIVE = "negative"
+
+
+class CachedLookupError(Exception):
+    """
+    Raised on a negative-cache hit: the lookup failed recently
+    and is not retried until the negative entry expires
+    """
+
+
+class SQLiteCache:
+    """
+    Persistent key/value cache with per-entry TTLs, stored in SQLite (WAL).
+    Entries past their TTL stay servable until `stale_until` while a
+    background refresh replaces them. Failures are cached as negative
+    entries with their own (short) TTL. With `max_entries`, the least
+    recently used entries of the namespace are evicted beyond that size.
+    """
+
+    def __init__(self, namespace: str, path: str = CACHE_DB_PATH, max_entries: Optional[int] = None):
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "errors": 0,
+            "evictions": 0,
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace   TEXT NOT NULL,
+                    key         TEXT NOT NULL,
+                    value       TEXT NOT NULL,
+                    negative    INTEGER NOT NULL DEFAULT 0,
+                    stored_at   REAL NOT NULL,
+                    expires_at  REAL NOT NULL,
+                    stale_until REAL NOT NULL,
+                    last_used   REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            # Databases created before LRU support
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+            if "last_used" not in columns:
+                conn.execute("ALTER TABLE cache ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache(namespace, last_used)")
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def get(self, key: str):
+        """
+        Returns (value, state) with state fresh/stale/negative,
+        or None when the key is missing or past its stale window
+        """
+        row = self._connect().execute(
+            "SELECT value, negative, expires_at, stale_until FROM cache "
+            "WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        value, negative, expires_at, stale_until = row
+        now = time.time()
+
+        if self.max_entries:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE cache SET last_used = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key)
+                )
+
+        if now < expires_at:
+            return json.loads(value), NEGATIVE if negative else FRESH
+        if now < stale_until and not negative:
+            return json.loads(value), STALE
+        return None
+
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0, negative: bool = False):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache "
+                "(namespace, key, value, negative, stored_at, expires_at, stale_until, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.namespace, key, json.dumps(value), int(negative),
+                    now, now + ttl, now + ttl + stale_ttl, now
+                )
+            )
+
+            if self.max_entries:
+                self._evict(conn)
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: float,
+        negative_ttl: float,
+        stale_ttl: float = 0,
+        transient: Tuple[type, ...] = ()
+    ) -> Any:
+        """
+        Cached value for `key`, calling `loader` on a miss.
+        A stale hit is returned immediately and refreshed in the background.
+        A loader exception is cached as a negative entry and re-raised;
+        later negative hits raise CachedLookupError with the same message.
+        Exceptions in `transient` are re-raised without being cached.
+        """
+        cached = self.get(key)
+
+        if cached is not None:
+            value, state = cached
+
+            if state == FRESH:
+                self._count("hits")
+                return value
+
+            if state == NEGATIVE:
+                self._count("negative_hits")
+                raise CachedLookupError(value)
+
+            self._count("stale_hits")
+            self._schedule_refresh(
+                key,
+                lambda: self._load(key, loader, ttl, negative_ttl, stale_ttl, cache_errors=False),
+            )
+            return value
+
+        self._count("misses")
+        return self._load(key, loader, ttl, negative_ttl, stale_ttl, transient=transient)
+
+    def get_many_or_load(
+        self,
+        keys: List[str],
+        loader: Callable[[List[str]], Dict[str, Any]],
+        ttl: float,
+        negative_ttl: float,
+        stale_ttl: float = 0
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Batch form of get_or_load: every miss is resolved by ONE
+        loader(missing_keys) call returning {key: value}, and all stale
+        keys are refreshed together in the background.
+        Returns (values, errors) where errors maps key -> message.
+        """
+        values, errors = {}, {}
+        missing, stale = [], []
+
+        for key in dict.fromkeys(keys):
+            cached = self.get(key)
+
+            if cached is None:
+                self._count("misses")
+                missing.append(key)
+                continue
+
+            value, state = cached
+            if state == NEGATIVE:
+                self._count("negative_hits")
+                errors[key] = value
+                continue
+
+            self._count("hits" if state == FRESH else "stale_hits")
+            values[key] = value
+            if state == STALE:
+                stale.append(key)
+
+        if stale:
+            self._schedule_refresh(
+                tuple(stale),
+                lambda: self._load_many(stale, loader, ttl, negative_ttl, stale_ttl, cache_errors=False),
+            )
+
+        if missing:
+            try:
+                values.update(self._load_many(missing, loader, ttl, negative_ttl, stale_ttl))
+            except Exception as e:
+                errors.update({key: str(e) for key in missing})
+
+        return values, errors
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+
+        lookups = counters["hits"] + counters["stale_hits"] + counters["negative_hits"] + counters["misses"]
+        served = lookups - counters["misses"]
+
+        counters["entries"] = self._connect().execute(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        counters["hit_ratio"] = round(served / lookups, 3) if lookups else None
+        return counters
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _load(self, key, loader, ttl, negative_ttl, stale_ttl, cache_errors=True, transient=()):
+        # A failed background refresh keeps serving the stale entry
+        try:
+            value = loader()
+        except Exception as e:
+            self._count("errors")
+            if cache_errors and not isinstance(e, transient):
+                self.set(key, str(e), negative_ttl, negative=True)
+            raise
+
+        self.set(key, value, ttl, stale_ttl)
+        return value
+
+    def _load_many(self, keys, loader, ttl, negative_ttl, stale_ttl, cache_errors=True) -> Dict[str, Any]:
+        try:
+            loaded = loader(list(keys))
+        except Exception as e:
+            self._count("errors")
+            if cache_errors:
+                for key in keys:
+                    self.set(key, str(e), negative_ttl, negative=True)
+            raise
+
+        for key in keys:
+            if key in loaded:
+                self.set(key, loaded[key], ttl, stale_ttl)
+        return loaded
+
+    def _evict(self, conn: sqlite3.Connection):
+        count = conn.execute(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+
+        conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            "SELECT key FROM cache WHERE namespace = ? ORDER BY last_used LIMIT ?)",
+            (self.namespace, self.namespace, excess)
+        )
+        with self._lock:
+            self._counters["evictions"] += excess
+
+    def _schedule_refresh(self, key, job: Callable[[], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._count("refreshes")
+                job()
+            except Exception as e:
+                logger.info(f"Background refresh of {self.namespace}:{key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        _refresh_pool.submit(refresh)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+def get_cache(namespace: str, max_entries: Optional[int] = None) -> SQLiteCache:
+    """
+    Process-wide cache instance per namespace
+    (`max_entries` applies when the instance is first created)
+    """
+    cache = _caches.get(namespace)
+    if cache is not None:
+        return cache
+
+    with _registry_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = SQLiteCache(namespace, max_entries=max_entries)
+            _caches[namespace] = cache
+
+    return cache
+
+
+def get_cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in list(_caches.items())}
@@ -1,35 +1,63 @@
-import requests
+from app.config import NVD_MODE, NVD_MAX_QUEUE_WAIT, VERSION_FILTER_RESULTS
+from app.utils.http_client import get_session
+from app.vuln_sources.nvd_scheduler import get_scheduler
+from app.vuln_sources.nvd_mirror import get_mirror, product_candidates
+from app.vuln_sources.version_ranges import parse_version, cve_version_ranges
 
 NVD_API_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
 
 class NVDClient:
-    def __init__(self, api_key=None, timeout=15):
+    def __init__(self, api_key=None, timeout=15, mode=NVD_MODE):
         self.headers = {}
         self.timeout = timeout
+        self.mode = mode
 
         if api_key:
             self.headers["apiKey"] = api_key
 
     def search(self, product, version=None, limit=10):
+        if self.mode == "mirror":
+            return get_mirror().search(product, version, limit)
+
+        version_key = parse_version(version)
+
         params = {
             "keywordSearch": product,
-            "resultsPerPage": limit
+            "resultsPerPage": limit if version_key is None else max(limit, VERSION_FILTER_RESULTS)
         }
 
-        response = requests.get(
-            NVD_API_URL,
-            headers=self.headers,
-            params=params,
-            timeout=self.timeout
+        # Rate-limited and shared with identical in-flight queries
+        response = get_scheduler().submit(
+            ("keywordSearch", params["keywordSearch"], params["resultsPerPage"]),
+            lambda: get_session("nvd").get(
+                NVD_API_URL,
+                headers=self.headers,
+                params=params,
+                timeout=self.timeout
+            ),
+            max_wait=NVD_MAX_QUEUE_WAIT
         )
         response.raise_for_status()
-        return self._parse(response.json())
+        return self._parse(response.json(), product, version)[:limit]
 
-    def _parse(self, data):
+    def _parse(self, data, product=None, version=None):
+        """
+        With a parseable version, CVEs whose CPE ranges for the product
+        don't cover it are dropped. CVEs without a CPE entry for the
+        product (not yet analysed, or filed under another name) are kept.
+        """
         results = []
+        version_key = parse_version(version)
+        products = product_candidates(product) if product else []
 
         for item in data.get("vulnerabilities", []):
             cve = item["cve"]
+
+            if version_key is not None:
+                ranges = cve_version_ranges(cve, products)
+                if ranges is not None and not any(r.contains(version_key) for r in ranges):
+                    continue
+
             metrics = cve.get("metrics", {})
 
             score = None
@@ -0,0 +1,471 @@
+"""
+Local NVD mirror.
+
+Imports NVD JSON feed files (2.0 API format or legacy 1.1 feeds, optionally
+gzipped) into SQLite, indexed by CPE vendor/product, so lookups never leave
+the machine.
+
+    python -m app.vuln_sources.nvd_mirror import feeds/nvdcve-2.0-*.json.gz
+    python -m app.vuln_sources.nvd_mirror stats
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.config import NVD_MIRROR_PATH
+from app.vuln_sources.version_ranges import IntervalIndex, VersionRange, parse_version
+
+logger = logging.getLogger(__name__)
+
+# CPE 2.3 fields are ':'-separated; '\:' is an escaped colon inside a field
+_CPE_SPLIT_RE = re.compile(r"(?<!\\):")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cves (
+    id          TEXT PRIMARY KEY,
+    description TEXT,
+    cvss        REAL,
+    published   TEXT
+);
+CREATE TABLE IF NOT EXISTS cpe_matches (
+    cve_id              TEXT NOT NULL,
+    vendor              TEXT NOT NULL,
+    product             TEXT NOT NULL,
+    version             TEXT,
+    version_start_incl  TEXT,
+    version_start_excl  TEXT,
+    version_end_incl    TEXT,
+    version_end_excl    TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+-- Needed while importing (replacing a CVE's matches)
+CREATE INDEX IF NOT EXISTS idx_cpe_cve ON cpe_matches (cve_id);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_cpe_product ON cpe_matches (product, vendor);
+CREATE INDEX IF NOT EXISTS idx_cpe_vendor ON cpe_matches (vendor);
+"""
+
+
+class NVDMirror:
+    """
+    Read/write access to the local mirror database
+    """
+
+    def __init__(self, path: str = NVD_MIRROR_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._ready = False
+        # meta.last_import when the cached state was read; imports run in another process
+        self._import_version = None
+        self._index_for = lru_cache(maxsize=512)(self._build_index)
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+
+    def is_ready(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        self._check_import()
+        if self._ready:
+            return True
+        row = self._connect().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'cves'"
+        ).fetchone()
+        self._ready = row is not None
+        return self._ready
+
+    def search(self, product: str, version: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        """
+        CVEs whose vulnerable CPE ranges for `product` cover `version`
+        (every CVE for the product when the version is unknown), newest first.
+        Same result shape as NVDClient.search.
+        """
+        rows = self._cves_for_product(product, limit, self._applicable_ids(product, version))
+
+        return [
+            {
+                "id": cve_id,
+                "description": description,
+                "cvss": cvss,
+                "source": "NVD"
+            }
+            for cve_id, description, cvss in rows
+        ]
+
+    def product_summary(self, product: str, max_results: int = 5, version: Optional[str] = None) -> Dict:
+        """
+        CVE ids and affected upper bounds for a product
+        (the shape nvd_fallback_by_product reports)
+        """
+        ids = self._applicable_ids(product, version)
+        cves = [row[0] for row in self._cves_for_product(product, max_results, ids)]
+
+        _, upper_bounds = self._index_for(tuple(product_candidates(product)), self._import_version)
+        affected_versions = set()
+        for cve_id in (upper_bounds if ids is None else ids):
+            affected_versions.update(upper_bounds.get(cve_id, ()))
+
+        return {
+            "cves": cves,
+            "affected_versions": sorted(affected_versions),
+        }
+
+    def stats(self) -> Dict:
+        if not self.is_ready():
+            return {"ready": False, "path": self.path}
+
+        conn = self._connect()
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+
+        return {
+            "ready": True,
+            "path": self.path,
+            "cves": conn.execute("SELECT COUNT(*) FROM cves").fetchone()[0],
+            "cpe_matches": conn.execute("SELECT COUNT(*) FROM cpe_matches").fetchone()[0],
+            "size_bytes": page_count * page_size,
+            "last_import": json.loads(meta["last_import"]) if "last_import" in meta else None,
+        }
+
+    # -------------------------
+    # Import
+    # -------------------------
+
+    def import_feeds(self, paths: Iterable[str]) -> Dict:
+        """
+        Load feed files into the mirror. Re-importing a CVE replaces it,
+        so newer feeds (e.g. "modified") can be applied on top.
+        """
+        started = time.perf_counter()
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+
+        cve_count = 0
+        match_count = 0
+        files = []
+
+        for path in paths:
+            file_started = time.perf_counter()
+            file_cves = 0
+
+            with conn:
+                for record in _read_feed(path):
+                    conn.execute("DELETE FROM cpe_matches WHERE cve_id = ?", (record["id"],))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cves (id, description, cvss, published) "
+                        "VALUES (?, ?, ?, ?)",
+                        (record["id"], record["description"], record["cvss"], record["published"])
+                    )
+                    conn.executemany(
+                        "INSERT INTO cpe_matches VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(record["id"], *match) for match in record["matches"]]
+                    )
+                    file_cves += 1
+                    match_count += len(record["matches"])
+
+            cve_count += file_cves
+            files.append({
+                "path": path,
+                "cves": file_cves,
+                "seconds": round(time.perf_counter() - file_started, 2),
+            })
+            logger.info(f"Imported {file_cves} CVEs from {path}")
+
+        index_started = time.perf_counter()
+        conn.executescript(_INDEXES)
+        conn.execute("ANALYZE")
+
+        report = {
+            "files": files,
+            "cves_imported": cve_count,
+            "cpe_matches_imported": match_count,
+            "index_seconds": round(time.perf_counter() - index_started, 2),
+            "total_seconds": round(time.perf_counter() - started, 2),
+            "imported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_import', ?)",
+                (json.dumps(report),)
+            )
+        self._check_import()
+
+        report["size_bytes"] = self.stats()["size_bytes"]
+        return report
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _check_import(self):
+        """
+        Forget indexes and readiness read before the latest import
+        (one primary-key lookup per call)
+        """
+        try:
+            row = self._connect().execute("SELECT value FROM meta WHERE key = 'last_import'").fetchone()
+        except sqlite3.OperationalError:
+            # No tables yet
+            row = None
+
+        version = row[0] if row else None
+        if version != self._import_version:
+            self._import_version = version
+            self._ready = False
+            self._index_for.cache_clear()
+
+    def _require_ready(self):
+        if not self.is_ready():
+            raise RuntimeError(
+                "NVD mirror is empty; run `python -m app.vuln_sources.nvd_mirror import <feeds>`"
+            )
+
+    def _applicable_ids(self, product: str, version: Optional[str]) -> Optional[Set[str]]:
+        """
+        CVE ids affecting this exact version, or None when it can't be parsed
+        """
+        version_key = parse_version(version)
+        if version_key is None:
+            return None
+
+        self._require_ready()
+        index, _ = self._index_for(tuple(product_candidates(product)), self._import_version)
+        return index.query(version_key)
+
+    def _build_index(self, candidates: Tuple[str, ...], import_version: Optional[str]):
+        """
+        Version interval index and upper bounds per CVE for one product,
+        built from the mirror once and kept until the next import.
+        `import_version` only keys the cache: an index built from an older
+        import never answers after a newer one.
+        """
+        placeholders = ",".join("?" * len(candidates))
+        index = IntervalIndex()
+        upper_bounds: Dict[str, Set[str]] = {}
+
+        rows = self._connect().execute(
+            f"SELECT cve_id, version, version_start_incl, version_start_excl, "
+            f"version_end_incl, version_end_excl FROM cpe_matches "
+            f"WHERE product IN ({placeholders})",
+            candidates
+        )
+
+        for cve_id, version, start_incl, start_excl, end_incl, end_excl in rows:
+            index.add(cve_id, VersionRange.from_cpe_match(version, start_incl, start_excl, end_incl, end_excl))
+            bounds = upper_bounds.setdefault(cve_id, set())
+            if end_incl or end_excl:
+                bounds.add(end_incl or end_excl)
+
+        return index, upper_bounds
+
+    def _cves_for_product(self, product: str, limit: int, ids: Optional[Set[str]] = None):
+        self._require_ready()
+        conn = self._connect()
+
+        if ids is None:
+            candidates = product_candidates(product)
+            placeholders = ",".join("?" * len(candidates))
+
+            return conn.execute(
+                f"SELECT c.id, c.description, c.cvss FROM cves c "
+                f"WHERE c.id IN (SELECT cve_id FROM cpe_matches WHERE product IN ({placeholders})) "
+                f"ORDER BY c.published DESC LIMIT ?",
+                (*candidates, limit)
+            ).fetchall()
+
+        rows = []
+        ids = list(ids)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows.extend(conn.execute(
+                f"SELECT id, description, cvss, published FROM cves "
+                f"WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ))
+
+        rows.sort(key=lambda row: row[3] or "", reverse=True)
+        return [row[:3] for row in rows[:limit]]
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+
+def get_mirror() -> NVDMirror:
+    global _mirror
+
+    if _mirror is None:
+        with _mirror_lock:
+            if _mirror is None:
+                _mirror = NVDMirror()
+    return _mirror
+
+
+def product_candidates(product: str) -> List[str]:
+    """
+    CPE product names a detected technology name may be filed under
+    ("Moment.js" -> moment.js, moment, momentjs)
+    """
+    name = product.strip().lower()
+    candidates = {name, name.replace(" ", "_"), name.replace(" ", "")}
+
+    for candidate in list(candidates):
+        if candidate.endswith(".js"):
+            candidates.add(candidate[:-3])
+            candidates.add(candidate[:-3] + "js")
+
+    return sorted(candidates)
+
+
+# -------------------------
+# Feed parsing
+# -------------------------
+
+def _read_feed(path: str) -> Iterator[Dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as fh:
+        data = json.load(fh)
+
+    if "vulnerabilities" in data:
+        for item in data["vulnerabilities"]:
+            yield _parse_v2(item["cve"])
+    elif "CVE_Items" in data:
+        for item in data["CVE_Items"]:
+            yield _parse_v11(item)
+    else:
+        raise ValueError(f"{path} is not an NVD JSON feed")
+
+
+def _parse_v2(cve: Dict) -> Dict:
+    metrics = cve.get("metrics", {})
+    score = None
+    for key in ("cvssMetricV31", "cvssMetricV30"):
+        if metrics.get(key):
+            score = metrics[key][0]["cvssData"]["baseScore"]
+            break
+
+    matches = []
+    for config in cve.get("configurations", []):
+        for node in config.get("nodes", []):
+            for match in node.get("cpeMatch", []):
+                row = _match_row(match.get("criteria"), match)
+                if row and match.get("vulnerable", False):
+                    matches.append(row)
+
+    return {
+        "id": cve["id"],
+        "description": _english(cve.get("descriptions", []), "value"),
+        "cvss": score,
+        "published": cve.get("published"),
+        "matches": matches,
+    }
+
+
+def _parse_v11(item: Dict) -> Dict:
+    impact = item.get("impact", {})
+    score = impact.get("baseMetricV3", {}).get("cvssV3", {}).get("baseScore")
+
+    matches = []
+    stack = list(item.get("configurations", {}).get("nodes", []))
+    while stack:
+        node = stack.pop()
+        stack.extend(node.get("children", []))
+        for match in node.get("cpe_match", []):
+            row = _match_row(match.get("cpe23Uri"), match)
+            if row and match.get("vulnerable", False):
+                matches.append(row)
+
+    cve = item["cve"]
+    return {
+        "id": cve["CVE_data_meta"]["ID"],
+        "description": _english(cve.get("description", {}).get("description_data", []), "value"),
+        "cvss": score,
+        "published": item.get("publishedDate"),
+        "matches": matches,
+    }
+
+
+def _match_row(cpe: Optional[str], match: Dict):
+    if not cpe:
+        return None
+
+    fields = _CPE_SPLIT_RE.split(cpe)
+    if len(fields) < 6:
+        return None
+
+    vendor, product, version = fields[3].lower(), fields[4].lower(), fields[5]
+    if version in ("*", "-"):
+        version = None
+
+    return (
+        vendor,
+        product,
+        version,
+        match.get("versionStartIncluding"),
+        match.get("versionStartExcluding"),
+        match.get("versionEndIncluding"),
+        match.get("versionEndExcluding"),
+    )
+
+
+def _english(entries: List[Dict], field: str) -> str:
+    for entry in entries:
+        if entry.get("lang") == "en":
+            return entry.get(field, "")
+    return entries[0].get(field, "") if entries else ""
+
+
+# -------------------------
+# CLI
+# -------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local NVD mirror")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = sub.add_parser("import", help="Import NVD JSON feed files (.json or .json.gz)")
+    import_cmd.add_argument("files", nargs="+")
+    sub.add_parser("stats", help="Show mirror size and last import")
+
+    args = parser.parse_args(argv)
+    mirror = get_mirror()
+
+    if args.command == "import":
+        report = mirror.import_feeds(args.files)
+    else:
+        report = mirror.stats()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    main()
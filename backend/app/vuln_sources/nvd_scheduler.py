@@ -0,0 +1,281 @@
+"""
+Shared scheduler for NVD API requests.
+
+NVD allows 5 requests per rolling 30 s window without an API key and 50
+with one. Every NVD call goes through one process-wide queue that:
+
+- enforces that window exactly (a sliding log of send times),
+- collapses identical concurrent requests into one in-flight request,
+- serves interactive scans before batch work,
+- backs off the whole window when NVD answers 403/429.
+"""
+
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Hashable, Optional
+
+from app.config import (
+    NVD_API_KEY,
+    NVD_REQUESTS_PER_WINDOW,
+    NVD_RATE_WINDOW,
+    NVD_THROTTLE_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BATCH = 1
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+_priority = contextvars.ContextVar("nvd_priority", default=INTERACTIVE)
+
+THROTTLED_STATUS = {403, 429}
+
+
+class NVDBusy(Exception):
+    """
+    The queue is too long for the caller's wait budget
+    """
+
+
+@contextmanager
+def request_priority(priority: int):
+    """
+    NVD requests made inside this block (same thread/task) use `priority`
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RollingWindowLimiter:
+    """
+    At most `limit` sends in any `window` seconds
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._sent = deque()
+
+    def wait_time(self, needed: int = 1) -> float:
+        """
+        Seconds until `needed` more requests may be sent
+        """
+        now = time.monotonic()
+        self._expire(now)
+
+        excess = needed - (self.limit - len(self._sent))
+        if excess <= 0:
+            return 0.0
+
+        # Slots free up as old sends leave the window, `limit` per window after that
+        windows, index = divmod(excess - 1, self.limit)
+        if index < len(self._sent):
+            first = self._sent[index] + self.window - now
+        else:
+            first = self.window
+        return max(0.0, first + windows * self.window)
+
+    def record(self):
+        self._sent.append(time.monotonic())
+
+    def drain(self):
+        """
+        Treat the window as exhausted from now on
+        """
+        now = time.monotonic()
+        self._sent = deque([now] * self.limit)
+
+    def in_window(self) -> int:
+        self._expire(time.monotonic())
+        return len(self._sent)
+
+    def _expire(self, now: float):
+        while self._sent and self._sent[0] <= now - self.window:
+            self._sent.popleft()
+
+
+class NVDScheduler:
+    """
+    Priority queue + rate limiter + in-flight deduplication.
+    `send` callables return a requests.Response; callers block until it
+    (or the shared one from an identical in-flight request) is available.
+    """
+
+    def __init__(self, limit: int, window: float, workers: int = 4):
+        self.limiter = RollingWindowLimiter(limit, window)
+        self._heap = []
+        self._seq = itertools.count()
+        self._queued = {}      # key -> (priority, seq) of its live heap entry
+        self._inflight = {}    # key -> Future
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nvd")
+        self._dispatcher = None
+        self._counters = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "sent": 0,
+            "throttled": 0,
+            "rejected_busy": 0,
+        }
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def submit(
+        self,
+        key: Hashable,
+        send: Callable,
+        priority: Optional[int] = None,
+        max_wait: Optional[float] = None
+    ):
+        """
+        Run `send` under the rate limit and return its response.
+        Identical keys already queued or in flight share one request.
+        Raises NVDBusy when the expected wait exceeds `max_wait`.
+        """
+        priority = _priority.get() if priority is None else priority
+
+        with self._cond:
+            self._counters["submitted"] += 1
+            future = self._inflight.get(key)
+
+            if future is not None:
+                self._counters["deduplicated"] += 1
+                # An interactive caller lifts a queued batch request
+                if key in self._queued and priority < self._queued[key][0]:
+                    self._push(priority, key, send, future, 0)
+            else:
+                if max_wait is not None:
+                    wait = self._expected_wait_locked(priority)
+                    if wait > max_wait:
+                        self._counters["rejected_busy"] += 1
+                        raise NVDBusy(f"NVD queue wait ~{round(wait)}s exceeds {max_wait}s")
+
+                future = Future()
+                self._inflight[key] = future
+                self._push(priority, key, send, future, 0)
+                self._ensure_dispatcher()
+
+        return future.result()
+
+    def expected_wait(self, priority: int = INTERACTIVE) -> float:
+        """
+        Seconds a new request at `priority` would wait for its slot
+        """
+        with self._cond:
+            return self._expected_wait_locked(priority)
+
+    def queue_depth(self) -> dict:
+        with self._cond:
+            depth = {name: 0 for name in _PRIORITY_NAMES.values()}
+            for priority, _ in self._queued.values():
+                depth[_PRIORITY_NAMES.get(priority, str(priority))] += 1
+            return depth
+
+    def stats(self) -> dict:
+        depth = self.queue_depth()
+        with self._cond:
+            return {
+                "limit": self.limiter.limit,
+                "window_s": self.limiter.window,
+                "sent_in_window": self.limiter.in_window(),
+                "queue_depth": depth,
+                "in_flight": len(self._inflight),
+                "expected_wait_s": {
+                    name: round(self._expected_wait_locked(priority), 1)
+                    for priority, name in _PRIORITY_NAMES.items()
+                },
+                **self._counters,
+            }
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _push(self, priority, key, send, future, attempt):
+        seq = next(self._seq)
+        self._queued[key] = (priority, seq)
+        heapq.heappush(self._heap, (priority, seq, key, send, future, attempt))
+        self._cond.notify()
+
+    def _expected_wait_locked(self, priority: int) -> float:
+        ahead = sum(1 for p, _ in self._queued.values() if p <= priority)
+        return self.limiter.wait_time(ahead + 1)
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch, name="nvd-dispatcher", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                # Drop entries superseded by a higher-priority copy of the same key
+                while self._heap and self._queued.get(self._heap[0][2]) != self._heap[0][:2]:
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                wait = self.limiter.wait_time()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+
+                priority, seq, key, send, future, attempt = heapq.heappop(self._heap)
+
+                del self._queued[key]
+                self.limiter.record()
+                self._counters["sent"] += 1
+
+            self._executor.submit(self._send, priority, key, send, future, attempt)
+
+    def _send(self, priority, key, send, future, attempt):
+        try:
+            response = send()
+        except Exception as e:
+            with self._cond:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+
+        if getattr(response, "status_code", None) in THROTTLED_STATUS and attempt < NVD_THROTTLE_RETRIES:
+            logger.warning(f"NVD throttled a request (HTTP {response.status_code}); backing off one window")
+            with self._cond:
+                self._counters["throttled"] += 1
+                self.limiter.drain()
+                self._push(priority, key, send, future, attempt + 1)
+            return
+
+        with self._cond:
+            self._inflight.pop(key, None)
+        future.set_result(response)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> NVDScheduler:
+    global _scheduler
+
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                limit = NVD_REQUESTS_PER_WINDOW or (50 if NVD_API_KEY else 5)
+                _scheduler = NVDScheduler(limit, NVD_RATE_WINDOW)
+                logger.info(f"NVD scheduler: {limit} requests / {NVD_RATE_WINDOW}s")
+    return _scheduler
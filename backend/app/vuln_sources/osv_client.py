@@ -1,6 +1,28 @@
-import requests
+import math
 
-OSV_API = "https://api.osv.dev/v1/query"
+from app.config import OSV_API_URL
+from app.utils.http_client import get_session
+
+OSV_API = f"{OSV_API_URL}/v1/query"
+OSV_BATCH_API = f"{OSV_API_URL}/v1/querybatch"
+OSV_VULN_API = f"{OSV_API_URL}/v1/vulns"
+
+# database_specific.severity (GitHub advisories) -> our severity levels
+OSV_SEVERITY_LABELS = {"LOW": "LOW", "MODERATE": "MEDIUM", "MEDIUM": "MEDIUM", "HIGH": "HIGH", "CRITICAL": "CRITICAL"}
+
+# CVSS v3.x base metric weights
+_CVSS3_WEIGHTS = {
+    "AV": {"N": 0.85, "A": 0.62, "L": 0.55, "P": 0.2},
+    "AC": {"L": 0.77, "H": 0.44},
+    "UI": {"N": 0.85, "R": 0.62},
+    "C": {"H": 0.56, "L": 0.22, "N": 0},
+    "I": {"H": 0.56, "L": 0.22, "N": 0},
+    "A": {"H": 0.56, "L": 0.22, "N": 0},
+}
+_CVSS3_PRIVILEGES = {"U": {"N": 0.85, "L": 0.62, "H": 0.27}, "C": {"N": 0.85, "L": 0.68, "H": 0.5}}
+
+# OSV accepts at most 1000 queries per batch request
+MAX_BATCH_QUERIES = 1000
 
 class OSVClient:
     def query(self, ecosystem, package, version):
@@ -12,20 +34,118 @@ class OSVClient:
             "version": version
         }
 
-        response = requests.post(OSV_API, json=payload, timeout=10)
+        response = get_session("osv").post(OSV_API, json=payload, timeout=10)
         response.raise_for_status()
 
         return self._parse(response.json())
 
+    def get_vuln(self, vuln_id: str) -> dict:
+        """
+        Full advisory for one id (batch results carry ids only)
+        """
+        response = get_session("osv").get(f"{OSV_VULN_API}/{vuln_id}", timeout=10)
+        response.raise_for_status()
+
+        return self._parse_one(response.json())
+
+    def query_batch(self, packages):
+        """
+        Resolve many (ecosystem, package, version) tuples with /v1/querybatch.
+        Returns one vuln list per input, in order. Batch results only carry
+        ids, so entries have no summary/details/severity until completed
+        with get_vuln().
+        """
+        results = [[] for _ in packages]
+
+        for start in range(0, len(packages), MAX_BATCH_QUERIES):
+            pending = {
+                i: None
+                for i in range(start, min(start + MAX_BATCH_QUERIES, len(packages)))
+            }
+
+            # Follow per-query page tokens until every query is exhausted
+            while pending:
+                indexes = list(pending)
+                queries = []
+                for i in indexes:
+                    ecosystem, package, version = packages[i]
+                    query = {
+                        "package": {"name": package, "ecosystem": ecosystem},
+                        "version": version
+                    }
+                    if pending[i]:
+                        query["page_token"] = pending[i]
+                    queries.append(query)
+
+                response = get_session("osv").post(
+                    OSV_BATCH_API,
+                    json={"queries": queries},
+                    timeout=15
+                )
+                response.raise_for_status()
+
+                pending = {}
+                for i, result in zip(indexes, response.json().get("results", [])):
+                    results[i].extend(self._parse(result))
+                    if result.get("next_page_token"):
+                        pending[i] = result["next_page_token"]
+
+        return results
+
     def _parse(self, data):
-        vulns = []
+        return [self._parse_one(v) for v in data.get("vulns", [])]
+
+    def _parse_one(self, v):
+        label = str((v.get("database_specific") or {}).get("severity") or "").upper()
+        return {
+            "id": v["id"],
+            "summary": v.get("summary"),
+            "details": v.get("details"),
+            "cvss": _cvss_score(v.get("severity") or []),
+            "severity": OSV_SEVERITY_LABELS.get(label),
+            "source": "OSV"
+        }
+
+
+# -------------------------
+# Helper functions
+# -------------------------
+
+def _cvss_score(entries: list):
+    """
+    Base score of the first CVSS v3 vector in an OSV `severity` list
+    """
+    for entry in entries:
+        if entry.get("type") == "CVSS_V3":
+            try:
+                return _cvss3_base_score(entry["score"])
+            except (KeyError, ValueError):
+                continue
+    return None
+
+
+def _cvss3_base_score(vector: str) -> float:
+    # "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H"
+    metrics = dict(part.split(":", 1) for part in vector.split("/")[1:])
+    scope = metrics["S"]
+    w = {name: _CVSS3_WEIGHTS[name][metrics[name]] for name in _CVSS3_WEIGHTS}
+
+    iss = 1 - (1 - w["C"]) * (1 - w["I"]) * (1 - w["A"])
+    if scope == "U":
+        impact = 6.42 * iss
+    else:
+        impact = 7.52 * (iss - 0.029) - 3.25 * (iss - 0.02) ** 15
+    exploitability = 8.22 * w["AV"] * w["AC"] * _CVSS3_PRIVILEGES[scope][metrics["PR"]] * w["UI"]
+
+    if impact <= 0:
+        return 0.0
+    total = impact + exploitability if scope == "U" else 1.08 * (impact + exploitability)
+    return _roundup(min(total, 10))
 
-        for v in data.get("vulns", []):
-            vulns.append({
-                "id": v["id"],
-                "summary": v.get("summary"),
-                "details": v.get("details"),
-                "source": "OSV"
-            })
 
-        return vulns
+def _roundup(value: float) -> float:
+    # CVSS v3.1 Roundup: smallest one-decimal number >= value, float-safe
+    scaled = round(value * 100000)
+    if scaled % 10000 == 0:
+        return scaled / 100000.0
+    return (math.floor(scaled / 10000) + 1) / 10.0
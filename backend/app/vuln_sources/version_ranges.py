@@ -0,0 +1,258 @@
+"""
+Version parsing and CVE applicability.
+
+Versions are parsed once into comparable keys (semver, dotted, letter
+suffixes such as OpenSSL's 1.1.1k or OpenSSH's 7.4p1, pre-releases).
+Each CVE's CPE bounds become a VersionRange, and an IntervalIndex answers
+"which CVEs cover version V" with a binary search.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# Token kinds, in sort order
+_PRE = 0      # alpha / beta / rc ... sorts before the release itself
+_END = 1      # end of the version
+_POST = 2     # other letters (1.1.1k, 7.4p1) sort after the release
+_NUM = 3
+
+_END_TOKEN = (_END, 0, "")
+
+_PRERELEASE_RANK = {
+    "dev": 0, "snapshot": 0,
+    "a": 1, "alpha": 1,
+    "b": 2, "beta": 2,
+    "pre": 3, "preview": 3,
+    "c": 4, "rc": 4,
+}
+
+_TOKEN_RE = re.compile(r"\d+|[a-z]+")
+# CPE 2.3 fields are ':'-separated; '\:' is an escaped colon inside a field
+_CPE_SPLIT_RE = re.compile(r"(?<!\\):")
+_UNKNOWN = {"", "*", "-", "unspecified", "n/a"}
+
+VersionKey = Tuple[Tuple[int, int, str], ...]
+
+
+@lru_cache(maxsize=8192)
+def parse_version(raw: Optional[str]) -> Optional[VersionKey]:
+    """
+    Comparable key for a version string, or None when it is not a version.
+    "1.2" == "1.2.0" < "1.2.1-rc1" < "1.2.1" < "1.2.1a"
+    """
+    if raw is None:
+        return None
+
+    text = str(raw).strip().lower()
+    if text.startswith("v"):
+        text = text[1:]
+    # Semver build metadata never affects ordering
+    text = text.split("+", 1)[0]
+
+    if text in _UNKNOWN:
+        return None
+
+    matches = list(_TOKEN_RE.finditer(text))
+    tokens = [m.group() for m in matches]
+    if not tokens or not tokens[0].isdigit():
+        return None
+
+    # Leading numeric release part, without trailing zeros (1.2.0 == 1.2)
+    release = []
+    for token in tokens:
+        if not token.isdigit():
+            break
+        release.append(int(token))
+    rest = tokens[len(release):]
+
+    while release and release[-1] == 0:
+        release.pop()
+
+    key = [(_NUM, n, "") for n in release]
+    for i, token in enumerate(rest, start=len(tokens) - len(rest)):
+        # A lone trailing letter glued to a number is a patch level (1.0.2a), not alpha
+        trailing_letter = (
+            len(token) == 1
+            and i == len(tokens) - 1
+            and matches[i].start() > 0
+            and text[matches[i].start() - 1].isdigit()
+        )
+
+        if token.isdigit():
+            key.append((_NUM, int(token), ""))
+        elif token in _PRERELEASE_RANK and not trailing_letter:
+            key.append((_PRE, _PRERELEASE_RANK[token], token))
+        else:
+            key.append((_POST, 0, token))
+
+    key.append(_END_TOKEN)
+    return tuple(key)
+
+
+class VersionRange:
+    """
+    Interval of affected versions; None on a side means unbounded
+    """
+
+    __slots__ = ("start", "start_incl", "end", "end_incl")
+
+    def __init__(
+        self,
+        start: Optional[VersionKey] = None,
+        start_incl: bool = True,
+        end: Optional[VersionKey] = None,
+        end_incl: bool = True
+    ):
+        self.start = start
+        self.start_incl = start_incl
+        self.end = end
+        self.end_incl = end_incl
+
+    @classmethod
+    def from_cpe_match(
+        cls,
+        version: Optional[str] = None,
+        start_including: Optional[str] = None,
+        start_excluding: Optional[str] = None,
+        end_including: Optional[str] = None,
+        end_excluding: Optional[str] = None
+    ) -> "VersionRange":
+        """
+        Build from NVD cpeMatch fields. Explicit bounds win over the CPE
+        version; without either the range covers every version.
+        """
+        if start_including or start_excluding or end_including or end_excluding:
+            return cls(
+                start=parse_version(start_including or start_excluding),
+                start_incl=bool(start_including),
+                end=parse_version(end_including or end_excluding),
+                end_incl=bool(end_including),
+            )
+
+        exact = parse_version(version)
+        return cls(exact, True, exact, True)
+
+    def contains(self, key: VersionKey) -> bool:
+        if self.start is not None:
+            if key < self.start or (key == self.start and not self.start_incl):
+                return False
+        if self.end is not None:
+            if key > self.end or (key == self.end and not self.end_incl):
+                return False
+        return True
+
+
+class IntervalIndex:
+    """
+    Maps version ranges to items (CVE ids) and answers point queries.
+
+    Every distinct bound becomes a point; positions 2i+1 are the points
+    themselves and 2i the gaps before them, so each range is a [lo, hi]
+    span of positions. Spans are sorted by lo: a query bisects to the
+    candidates starting at or before the version and keeps those whose
+    hi reaches it.
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[Hashable, VersionRange]] = ()):
+        self._pending: List[Tuple[Hashable, VersionRange]] = list(ranges)
+        self._points: List[VersionKey] = []
+        self._los: List[int] = []
+        self._spans: List[Tuple[int, int, Hashable]] = []
+        self._items: Set[Hashable] = set()
+        self._built = False
+
+    def add(self, item: Hashable, version_range: VersionRange):
+        self._pending.append((item, version_range))
+        self._built = False
+
+    def items(self) -> Set[Hashable]:
+        self._build()
+        return set(self._items)
+
+    def query(self, version: VersionKey) -> Set[Hashable]:
+        """
+        Items whose range contains `version`
+        """
+        self._build()
+        position = self._position(version)
+        count = bisect_right(self._los, position)
+
+        return {
+            item
+            for _, hi, item in self._spans[:count]
+            if hi >= position
+        }
+
+    def _build(self):
+        if self._built:
+            return
+
+        points = set()
+        for _, version_range in self._pending:
+            if version_range.start is not None:
+                points.add(version_range.start)
+            if version_range.end is not None:
+                points.add(version_range.end)
+        self._points = sorted(points)
+        index: Dict[VersionKey, int] = {point: i for i, point in enumerate(self._points)}
+        last = 2 * len(self._points)
+
+        spans = []
+        for item, version_range in self._pending:
+            if version_range.start is None:
+                lo = 0
+            else:
+                lo = 2 * index[version_range.start] + (1 if version_range.start_incl else 2)
+
+            if version_range.end is None:
+                hi = last
+            else:
+                hi = 2 * index[version_range.end] + (1 if version_range.end_incl else 0)
+
+            if lo <= hi:
+                spans.append((lo, hi, item))
+            self._items.add(item)
+
+        spans.sort(key=lambda span: span[0])
+        self._spans = spans
+        self._los = [span[0] for span in spans]
+        self._built = True
+
+    def _position(self, version: VersionKey) -> int:
+        i = bisect_left(self._points, version)
+        if i < len(self._points) and self._points[i] == version:
+            return 2 * i + 1
+        return 2 * i
+
+
+def cve_version_ranges(cve: Dict, products: Iterable[str]) -> Optional[List[VersionRange]]:
+    """
+    Vulnerable ranges of an NVD 2.0 CVE record for the given CPE product
+    names, or None when the CVE has no CPE entry for any of them
+    """
+    products = set(products)
+    ranges = []
+    seen = False
+
+    for config in cve.get("configurations", []):
+        for node in config.get("nodes", []):
+            for match in node.get("cpeMatch", []):
+                fields = _CPE_SPLIT_RE.split(match.get("criteria", ""))
+                if len(fields) < 6 or fields[4].lower() not in products:
+                    continue
+
+                seen = True
+                if not match.get("vulnerable", False):
+                    continue
+
+                ranges.append(VersionRange.from_cpe_match(
+                    fields[5],
+                    match.get("versionStartIncluding"),
+                    match.get("versionStartExcluding"),
+                    match.get("versionEndIncluding"),
+                    match.get("versionEndExcluding"),
+                ))
+
+    return ranges if seen else None
@@ -0,0 +1,27 @@
+import time
+
+from app.services.html_signals import extract_signals
+
+
+def test_unclosed_quotes_are_linear():
+    # Used to backtrack super-linearly: 8000 repetitions took ~15 s
+    for unit in ("<meta x='", "<meta x='>", '<meta x="y '):
+        html = unit * 100000
+
+        started = time.perf_counter()
+        extract_signals("https://example.com", html)
+        assert time.perf_counter() - started < 2
+
+
+def test_apostrophe_in_unquoted_value_keeps_later_tags():
+    html = (
+        "<head><link href=/style.css title=Bob's>"
+        "<script src='/app.js'></script>"
+        '<meta name="generator" content="WordPress 6.4"></head>'
+    )
+
+    signals = extract_signals("https://example.com", html)
+
+    assert signals.links == ["/style.css"]
+    assert signals.scripts == ["/app.js"]
+    assert signals.meta == {"generator": "WordPress 6.4"}